@@ -7,6 +7,7 @@ import pandas as pd
 from pathlib import Path
 from config.config_loader import ConfigLoader
 from src.utilidades.logger import configurar_logger
+from src.transformadores.base import limpiar_columna_identificador, STRING_DTYPE
 
 logger = configurar_logger("finnovarisk.carga_datos")
 CONFIG_LOADER = ConfigLoader()
@@ -33,8 +34,10 @@ def limpiar_identificadores_al_cargar(df: pd.DataFrame, nombre_dataset: str) ->
         if any(identificador in col_lower for identificador in columnas_identificadores):
             # Esta columna necesita limpieza
             if df[col].dtype in ['float64', 'float32', 'int64', 'int32']:
-                # Convertir a string limpio
-                df[col] = df[col].apply(lambda x: str(int(x)) if pd.notna(x) and x == int(x) else str(x) if pd.notna(x) else "")
+                # Convertir a string limpio, vectorizado y ya tipado: los
+                # convertir_tipos_* de los transformadores reciben texto
+                # Arrow (si hay pyarrow) en vez de floats que re-interpretar
+                df[col] = limpiar_columna_identificador(df[col]).astype(STRING_DTYPE)
                 columnas_limpiadas.append(col)
     
     if columnas_limpiadas:
@@ -367,7 +370,7 @@ def cargar_auxiliares() -> dict[str, pd.DataFrame]:
             df = pd.read_excel(ruta)
             
             # Normalizar nombres de columnas
-            df.columns = [col.lower().strip() for col in df.columns]
+            df.columns = df.columns.str.lower().str.strip()
             
             auxiliares[clave_archivo] = df
             
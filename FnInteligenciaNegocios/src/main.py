@@ -2,8 +2,10 @@
 Módulo principal para la ejecución del ETL de Finnovarisk.
 Versión COMPLETA con todos los módulos implementados.
 """
+import multiprocessing
 import time
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -148,48 +150,57 @@ def main():
         logger.info("=" * 70)
         logger.info("")
         
-        # Análisis de Cartera
-        logger.info("1️⃣  Transformando Análisis de Cartera...")
-        logger.info("-" * 40)
-        df_ac = filtrar_finansuenos_ac(df_ac)
-        df_ac = procesar_analisis_cartera(df_ac)
-        df_ac = manejar_duplicados_ac(df_ac)
-        df_ac = crear_columna_mora_ac(df_ac)
-        logger.info(f"   ✅ COMPLETO: {len(df_ac):,} registros")
-        logger.info("")
-        
-        # FNZ007
-        logger.info("2️⃣  Transformando FNZ007...")
-        logger.info("-" * 40)
-        df_fnz007 = procesar_fnz007(df_fnz007)
-        logger.info(f"   ✅ COMPLETO: {len(df_fnz007):,} registros")
-        logger.info("")
-        
-        # Edades
-        if df_edades is not None:
-            logger.info("3️⃣  Transformando Edades...")
-            logger.info("-" * 40)
-            df_edades = procesar_edades(df_edades)
-            logger.info(f"   ✅ COMPLETO: {len(df_edades):,} registros")
-            logger.info("")
-        
-        # R05
-        if df_r05 is not None:
-            logger.info("4️⃣  Transformando R05...")
+        # Edades, R05 y Recaudos son independientes entre sí: se transforman
+        # en procesos aparte mientras AC y FNZ007 se procesan en este proceso.
+        # Cada proceso configura su logger al arrancar (con spawn no hereda
+        # los handlers) para que sus mensajes lleguen también a logs/logger.log
+        with ProcessPoolExecutor(max_workers=3, initializer=configurar_logger) as ejecutor:
+            futuro_edades = ejecutor.submit(procesar_edades, df_edades) if df_edades is not None else None
+            futuro_r05 = ejecutor.submit(procesar_r05, df_r05) if df_r05 is not None else None
+            futuro_recaudos = ejecutor.submit(procesar_recaudos, df_recaudos) if df_recaudos is not None else None
+            
+            # Análisis de Cartera
+            logger.info("1️⃣  Transformando Análisis de Cartera...")
             logger.info("-" * 40)
-            df_r05 = procesar_r05(df_r05)
-            if df_r05 is not None:
-                logger.info(f"   ✅ COMPLETO: {len(df_r05):,} registros")
+            df_ac = filtrar_finansuenos_ac(df_ac)
+            df_ac = procesar_analisis_cartera(df_ac)
+            df_ac = manejar_duplicados_ac(df_ac)
+            df_ac = crear_columna_mora_ac(df_ac)
+            logger.info(f"   ✅ COMPLETO: {len(df_ac):,} registros")
             logger.info("")
-        
-        # Recaudos
-        if df_recaudos is not None:
-            logger.info("5️⃣  Transformando Recaudos...")
+            
+            # FNZ007
+            logger.info("2️⃣  Transformando FNZ007...")
             logger.info("-" * 40)
-            df_recaudos = procesar_recaudos(df_recaudos)
-            if df_recaudos is not None:
-                logger.info(f"   ✅ COMPLETO: {len(df_recaudos):,} registros")
+            df_fnz007 = procesar_fnz007(df_fnz007)
+            logger.info(f"   ✅ COMPLETO: {len(df_fnz007):,} registros")
             logger.info("")
+            
+            # Edades
+            if futuro_edades is not None:
+                logger.info("3️⃣  Transformando Edades...")
+                logger.info("-" * 40)
+                df_edades = futuro_edades.result()
+                logger.info(f"   ✅ COMPLETO: {len(df_edades):,} registros")
+                logger.info("")
+            
+            # R05
+            if futuro_r05 is not None:
+                logger.info("4️⃣  Transformando R05...")
+                logger.info("-" * 40)
+                df_r05 = futuro_r05.result()
+                if df_r05 is not None:
+                    logger.info(f"   ✅ COMPLETO: {len(df_r05):,} registros")
+                logger.info("")
+            
+            # Recaudos
+            if futuro_recaudos is not None:
+                logger.info("5️⃣  Transformando Recaudos...")
+                logger.info("-" * 40)
+                df_recaudos = futuro_recaudos.result()
+                if df_recaudos is not None:
+                    logger.info(f"   ✅ COMPLETO: {len(df_recaudos):,} registros")
+                logger.info("")
         
         # FNZ001
         if df_fnz001 is not None:
@@ -221,7 +232,13 @@ def main():
             df_edades=df_edades,
             df_r05=df_r05,
             df_recaudos=df_recaudos,
-            dict_auxiliares=dict_auxiliares
+            dict_auxiliares=dict_auxiliares,
+            # Columnas a unir por dataset (opcional en config/datasets.json)
+            columnas_join={
+                nombre: cfg["columnas_join"]
+                for nombre, cfg in cargador.CONFIG_CARGA.items()
+                if "columnas_join" in cfg
+            }
         )
         logger.info(f"✅ BaseFNZ creado: {len(BaseFNZ_final):,} registros")
         logger.info(f"Base FNZ columnas: {BaseFNZ_final.columns.tolist()}")
@@ -419,4 +436,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Necesario en el ejecutable (Windows): los procesos de la Fase 2
+    # arrancan con spawn y no deben volver a correr todo el ETL
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
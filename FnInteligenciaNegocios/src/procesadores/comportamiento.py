@@ -6,6 +6,8 @@ Pivota datos de mora por fecha de corte (versión horizontal).
 import pandas as pd
 import numpy as np
 from src.utilidades.logger import configurar_logger
+from src.transformadores.analisis_cartera import codigos_mora, CATEGORIAS_MORA
+from src.transformadores.base import columnas_presentes
 
 logger = configurar_logger('finnovarisk.comportamiento')
 
@@ -125,7 +127,7 @@ def seleccionar_columnas_ac(df_ac: pd.DataFrame) -> pd.DataFrame:
     ]
     
     # Verificar qué columnas existen
-    columnas_disponibles = [col for col in columnas_requeridas if col in df_ac.columns]
+    columnas_disponibles = columnas_presentes(df_ac, columnas_requeridas)
     columnas_faltantes = set(columnas_requeridas) - set(columnas_disponibles)
     
     if columnas_faltantes:
@@ -161,22 +163,13 @@ def crear_columna_mora(df: pd.DataFrame) -> pd.DataFrame:
     # Asegurar que diasatras es numérico
     df['diasatras'] = pd.to_numeric(df['diasatras'], errors='coerce')
     
-    # Crear condiciones
-    conditions = [
-        (df['diasatras'] == 0),
-        (df['diasatras'] > 0) & (df['diasatras'] <= 30),
-        (df['diasatras'] > 30) & (df['diasatras'] <= 60),
-        (df['diasatras'] > 60) & (df['diasatras'] <= 90),
-        (df['diasatras'] > 90) & (df['diasatras'] <= 120),
-        (df['diasatras'] > 120) & (df['diasatras'] <= 150),
-        (df['diasatras'] > 150) & (df['diasatras'] <= 180),
-        (df['diasatras'] > 180) & (df['diasatras'] <= 210),
-        (df['diasatras'] > 210)
-    ]
-    
-    choices = ['A1', 'A2', 'B1', 'B2', 'C1', 'C2', 'D1', 'D2', 'EE']
-    
-    df['Mora'] = np.select(conditions, choices, default=None)
+    # Mismos tramos que crear_columna_mora_ac, en una sola pasada. Se deja
+    # como texto (object): procesar_columnas_mora escribe "." en las columnas
+    # pivotadas y eso no cabe en una categórica
+    codigos = codigos_mora(df['diasatras'])
+    mora = CATEGORIAS_MORA[codigos]
+    mora[codigos < 0] = None
+    df['Mora'] = mora
     
     # Estadísticas
     distribucion = df['Mora'].value_counts().sort_index()
@@ -211,7 +204,7 @@ def pivotar_comportamiento(df: pd.DataFrame) -> pd.DataFrame:
     
     # Columnas a pivotar
     columnas_pivotar = ['diasatras', 'vlrini', 'fechafac', 'valatras', 'saldofac', 'valorcuota', 'Mora']
-    columnas_disponibles = [col for col in columnas_pivotar if col in df.columns]
+    columnas_disponibles = columnas_presentes(df, columnas_pivotar)
     
     logger.info(f"   📋 Pivotando {len(columnas_disponibles)} variables por corte...")
     
@@ -220,7 +213,8 @@ def pivotar_comportamiento(df: pd.DataFrame) -> pd.DataFrame:
         index='cedula_numero',
         columns='corte',
         values=columnas_disponibles,
-        aggfunc='first'  # Si hay duplicados, tomar el primero
+        aggfunc='first',  # Si hay duplicados, tomar el primero
+        observed=True
     )
     
     # Aplanar nombres de columnas
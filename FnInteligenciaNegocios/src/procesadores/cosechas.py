@@ -7,6 +7,7 @@ import pandas as pd
 import numpy as np
 from dateutil.relativedelta import relativedelta
 from src.utilidades.logger import configurar_logger
+from src.transformadores.base import STRING_DTYPE, columnas_presentes
 
 logger = configurar_logger('finnovarisk.cosechas')
 
@@ -38,7 +39,7 @@ def crear_cosechas(df_fnz007: pd.DataFrame,
     # PASO 1: Seleccionar columnas de BaseFNZ
     logger.info("1️⃣ Seleccionando columnas base de FNZ007...")
     columnas_base = ['cedula_numero', 'corte', 'corte2', 'valor', 'fecha']
-    columnas_disponibles = [col for col in columnas_base if col in df_fnz007.columns]
+    columnas_disponibles = columnas_presentes(df_fnz007, columnas_base)
     columnas_faltantes = set(columnas_base) - set(columnas_disponibles)
     if columnas_faltantes:
         logger.warning(f"   ⚠️  Columnas faltantes en FNZ007: {columnas_faltantes}")
@@ -138,7 +139,7 @@ def unir_con_ac(cosechas: pd.DataFrame, df_ac: pd.DataFrame) -> pd.DataFrame:
                    'vlrini', 'valatras', 'saldofac']
     
     # Verificar qué columnas existen
-    columnas_disponibles = [col for col in columnas_ac if col in df_ac.columns]
+    columnas_disponibles = columnas_presentes(df_ac, columnas_ac)
     
     if 'cedula_numero' not in columnas_disponibles or 'corte' not in columnas_disponibles:
         logger.error("   ❌ BaseAC no tiene cedula_numero o corte")
@@ -228,7 +229,7 @@ def unir_con_r05(cosechas: pd.DataFrame, df_r05: pd.DataFrame) -> pd.DataFrame:
     
     # Seleccionar solo las columnas necesarias
     columnas_r05 = ['cedula_numero', 'corte', 'ABONO1']
-    columnas_disponibles = [col for col in columnas_r05 if col in df_r05.columns]
+    columnas_disponibles = columnas_presentes(df_r05, columnas_r05)
     
     df_r05_filtrado = df_r05[columnas_disponibles].copy()
     
@@ -266,7 +267,7 @@ def unir_con_recaudos(cosechas: pd.DataFrame, df_recaudos: pd.DataFrame) -> pd.D
     
     # Seleccionar solo las columnas necesarias
     columnas_recaudos = ['cedula_numero', 'corte', 'capitalrec']
-    columnas_disponibles = [col for col in columnas_recaudos if col in df_recaudos.columns]
+    columnas_disponibles = columnas_presentes(df_recaudos, columnas_recaudos)
     
     df_recaudos_filtrado = df_recaudos[columnas_disponibles].copy()
     
@@ -369,13 +370,17 @@ def filtrar_registros_na(cosechas: pd.DataFrame) -> tuple:
     registros_antes = len(cosechas)
     
     # Identificar registros con "NA-\d+"
-    mask_na = cosechas['cedula_numero'].astype(str).str.match(r'^NA-\d+', na=False)
+    # Texto Arrow (si hay pyarrow): el regex corre sobre el buffer UTF-8 y los
+    # nulos quedan <NA> → False, igual que el 'nan' de astype(str)
+    mask_na = cosechas['cedula_numero'].astype(STRING_DTYPE).str.match(r'^NA-\d+', na=False)
     
-    # Separar eliminados
-    eliminados = cosechas[mask_na].copy()
+    # Separar eliminados (la indexación booleana ya devuelve DataFrames
+    # nuevos y ninguno se modifica después: sin .copy() extra)
+    mask_na = mask_na.to_numpy()
+    eliminados = cosechas.loc[mask_na]
     
     # Filtrar Cosechas
-    cosechas = cosechas[~mask_na].copy()
+    cosechas = cosechas.loc[~mask_na]
     
     num_eliminados = len(eliminados)
     logger.info(f"   ✅ Filtro aplicado: {registros_antes:,} → {len(cosechas):,}")
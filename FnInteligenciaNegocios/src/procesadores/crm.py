@@ -7,9 +7,22 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from src.utilidades.logger import configurar_logger
+from src.transformadores.base import columnas_presentes
 
 logger = configurar_logger('finnovarisk.crm')
 
+# Columnas (y orden) del Excel CRM generado por el R
+COLUMNAS_CRM_R = [
+    'numero', 'analista', 'fecha', 'ciudad', 'nomciudad', 'fs0vende', 'vennombre',
+    'ccosto', 'cconombre', 'fs0montoap', 'cuotas', 'valor_tota', 'fs1sexo',
+    'fs1nacfec', 'fs1estcvil', 'npercargo', 'vvdatipo', 'vvdaaval', 'ingresos',
+    'gastos', 'nvescolar', 'corte2', 'act_lab', 'empresa', 'cargos', 'cedula',
+    'corte', 'cedula_numero', 'valor', 'fechapag', 'valatras', 'saldofac',
+    'cuotaatras', 'valorcuota', 'totcuotas', 'cuotaspag', 'rango_ingresos',
+    'rango_avaluo', 'rango_monto', 'rango_gastos', 'edad', 'rango_edad',
+    'rango_cuotas'
+]
+
 
 def crear_crm(df_fnz007: pd.DataFrame, df_ac: pd.DataFrame) -> pd.DataFrame:
     """
@@ -61,24 +74,13 @@ def crear_crm(df_fnz007: pd.DataFrame, df_ac: pd.DataFrame) -> pd.DataFrame:
     logger.info("")
     
     # --- Seleccionar solo las columnas que aparecen en el Excel del R ---
-    columnas_r = [
-        'numero', 'analista', 'fecha', 'ciudad', 'nomciudad', 'fs0vende', 'vennombre',
-        'ccosto', 'cconombre', 'fs0montoap', 'cuotas', 'valor_tota', 'fs1sexo',
-        'fs1nacfec', 'fs1estcvil', 'npercargo', 'vvdatipo', 'vvdaaval', 'ingresos',
-        'gastos', 'nvescolar', 'corte2', 'act_lab', 'empresa', 'cargos', 'cedula',
-        'corte', 'cedula_numero', 'valor', 'fechapag', 'valatras', 'saldofac',
-        'cuotaatras', 'valorcuota', 'totcuotas', 'cuotaspag', 'rango_ingresos',
-        'rango_avaluo', 'rango_monto', 'rango_gastos', 'edad', 'rango_edad',
-        'rango_cuotas'
-    ]
-
     # ✅ Usar CRM (mayúsculas)
     CRM = CRM.rename(columns={'nomciudad': 'ciudad'})
 
     if 'corte2' not in CRM.columns and 'corte' in CRM.columns:
         CRM['corte2'] = CRM['corte']
 
-    cols_ok = [c for c in columnas_r if c in CRM.columns]
+    cols_ok = [c for c in COLUMNAS_CRM_R if c in CRM.columns]
     CRM = CRM[cols_ok]
 
     logger.info(f"✅ CRM ajustado a columnas del R: {len(CRM.columns)} columnas")
@@ -115,7 +117,7 @@ def unir_con_ac_primer_registro(crm: pd.DataFrame, df_ac: pd.DataFrame) -> pd.Da
                    'cuotaatras', 'valorcuota', 'totcuotas', 'cuotaspag']
     
     # Verificar qué columnas existen
-    columnas_disponibles = [col for col in columnas_ac if col in df_ac.columns]
+    columnas_disponibles = columnas_presentes(df_ac, columnas_ac)
     
     if 'cedula_numero' not in columnas_disponibles:
         logger.error("   ❌ BaseAC no tiene cedula_numero")
@@ -124,7 +126,7 @@ def unir_con_ac_primer_registro(crm: pd.DataFrame, df_ac: pd.DataFrame) -> pd.Da
     # Tomar primer registro por cedula_numero (fecha más antigua)
     df_ac_primer = (df_ac[columnas_disponibles]
                     .sort_values('corte')
-                    .groupby('cedula_numero', as_index=False)
+                    .groupby('cedula_numero', as_index=False, observed=True)
                     .first())
     
     # Eliminar columna corte (solo la usamos para ordenar)
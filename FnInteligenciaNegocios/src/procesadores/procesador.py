@@ -1,17 +1,27 @@
 """
 Módulo de procesamiento - Joins y creación de BaseFNZ final
 """
+import numpy as np
 import pandas as pd
 from src.utilidades.logger import configurar_logger
+from src.transformadores.base import unir_columnas_texto, STRING_DTYPE
 
 logger = configurar_logger('finnovarisk.procesador')
 
 
-def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, dict_auxiliares):
+def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, dict_auxiliares,
+                  columnas_join: dict = None):
     """
     Realiza todos los joins según el script R original.
+
+    columnas_join: {dataset: [columnas]} opcional (clave "columnas_join" de
+    cada dataset en config/datasets.json). Si un dataset lo trae, de su
+    DataFrame solo se llevan al merge las llaves y esas columnas; si no, se
+    une completo como en el R.
+
     Returns: DataFrame BaseFNZ final con todos los datos unidos
     """
+    columnas_join = columnas_join or {}
     logger.info("="*70)
     logger.info("🔗 INICIANDO UNIÓN DE DATASETS")
     logger.info("="*70)
@@ -23,9 +33,9 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
     logger.info("1️⃣ JOIN: FNZ007 + FNZ001")
     logger.info("-"*40)
 
-    fnz001_para_join = df_fnz001[['numero', 'cedula', 'corte','valor']].copy()
-    registros_fnz001_antes = len(fnz001_para_join)
-    fnz001_para_join = fnz001_para_join.drop_duplicates(subset=['numero'], keep='first')
+    # drop_duplicates ya devuelve un DataFrame nuevo: no hace falta copiar la selección
+    registros_fnz001_antes = len(df_fnz001)
+    fnz001_para_join = df_fnz001[['numero', 'cedula', 'corte', 'valor']].drop_duplicates(subset=['numero'], keep='first')
     logger.info(f"   FNZ001 duplicados eliminados: {registros_fnz001_antes:,} → {len(fnz001_para_join):,}")
 
     BaseFNZ = df_fnz007.merge(
@@ -50,9 +60,9 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
     logger.info("📝 Creando llave cedula_numero en BaseFNZ")
     logger.info("-"*40)
     if 'cedula' in BaseFNZ.columns and 'numero' in BaseFNZ.columns:
-        BaseFNZ['cedula']   = BaseFNZ['cedula'].astype(str).fillna('').str.strip()
-        BaseFNZ['numero']   = BaseFNZ['numero'].astype(str).fillna('').str.strip()
-        BaseFNZ['cedula_numero'] = BaseFNZ['cedula'] + '-' + BaseFNZ['numero']
+        BaseFNZ['cedula']   = _limpiar_llave(BaseFNZ['cedula'])
+        BaseFNZ['numero']   = _limpiar_llave(BaseFNZ['numero'])
+        BaseFNZ['cedula_numero'] = unir_columnas_texto(BaseFNZ['cedula'], BaseFNZ['numero'], '-')
         llaves_validas = BaseFNZ['cedula_numero'].notna().sum()
         logger.info(f"   ✅ Llave cedula_numero creada: {llaves_validas:,} registros válidos")
     else:
@@ -60,6 +70,30 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
         raise ValueError("Faltan columnas 'cedula' o 'numero' en BaseFNZ")
     logger.info("")
 
+    # ========================================
+    # FILTRO: Eliminar Estado Desembolsos
+    # Se aplica antes de los joins 2-5 (todos left join por cedula_numero):
+    # el resultado es el mismo y los merges procesan menos filas
+    # ========================================
+    logger.info("🚫 FILTRO: Eliminando Estado Desembolsos")
+    logger.info("-"*40)
+    if 'estado_desembolsos' in dict_auxiliares:
+        estado_desemp = dict_auxiliares['estado_desembolsos']
+        if 'cedula_numero' not in estado_desemp.columns:
+            if 'cedula' in estado_desemp.columns and 'numero' in estado_desemp.columns:
+                estado_desemp['cedula']   = _limpiar_llave(estado_desemp['cedula'])
+                estado_desemp['numero']   = _limpiar_llave(estado_desemp['numero'])
+                estado_desemp['cedula_numero'] = unir_columnas_texto(estado_desemp['cedula'], estado_desemp['numero'], '-')
+        registros_antes = len(BaseFNZ)
+        BaseFNZ = BaseFNZ[~BaseFNZ['cedula_numero'].isin(estado_desemp['cedula_numero'])]
+        eliminados = registros_antes - len(BaseFNZ)
+        porcentaje_eliminado = (eliminados / registros_antes) * 100
+        logger.info(f"   ✅ Filtro aplicado: {registros_antes:,} → {len(BaseFNZ):,} registros")
+        logger.info(f"   Eliminados: {eliminados:,} ({porcentaje_eliminado:.1f}%)")
+    else:
+        logger.warning("   ⚠️ Estado Desembolsos no disponible - Filtro omitido")
+    logger.info("")
+
     # ========================================
     # JOIN 2: BaseFNZ + Análisis de Cartera
     # ========================================
@@ -67,14 +101,9 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
     logger.info("-"*40)
     registros_antes = len(BaseFNZ)
 
-    BaseFNZ = BaseFNZ.merge(
-        df_ac,
-        on=['cedula_numero', 'corte'],
-        how='left',
-        suffixes=('', '_ac')
+    BaseFNZ, matches = _merge_con_conteo(
+        BaseFNZ, df_ac, ['cedula_numero', 'corte'], '_ac', columnas_join.get('ANALISIS_CARTERA')
     )
-
-    matches = BaseFNZ[df_ac.columns[0]].notna().sum()
     porcentaje_match = (matches / len(BaseFNZ)) * 100
     logger.info(f"   ✅ JOIN completado: {registros_antes:,} → {len(BaseFNZ):,} registros")
     logger.info(f"   Matches encontrados: {matches:,} ({porcentaje_match:.1f}%)")
@@ -87,8 +116,9 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
     logger.info("-"*40)
     if df_edades is not None and len(df_edades) > 0:
         registros_antes = len(BaseFNZ)
-        BaseFNZ = BaseFNZ.merge(df_edades, on='cedula_numero', how='left', suffixes=('', '_edades'))
-        matches = BaseFNZ[df_edades.columns[0]].notna().sum()
+        BaseFNZ, matches = _merge_con_conteo(
+            BaseFNZ, df_edades, 'cedula_numero', '_edades', columnas_join.get('EDADES')
+        )
         porcentaje_match = (matches / len(BaseFNZ)) * 100
         logger.info(f"   ✅ JOIN completado: {registros_antes:,} → {len(BaseFNZ):,} registros")
         logger.info(f"   Matches encontrados: {matches:,} ({porcentaje_match:.1f}%)")
@@ -103,8 +133,9 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
     logger.info("-"*40)
     if df_r05 is not None and len(df_r05) > 0:
         registros_antes = len(BaseFNZ)
-        BaseFNZ = BaseFNZ.merge(df_r05, on=['cedula_numero', 'corte'], how='left', suffixes=('', '_r05'))
-        matches = BaseFNZ['ABONO1'].notna().sum() if 'ABONO1' in BaseFNZ.columns else 0
+        BaseFNZ, matches = _merge_con_conteo(
+            BaseFNZ, df_r05, ['cedula_numero', 'corte'], '_r05', columnas_join.get('R05')
+        )
         porcentaje_match = (matches / len(BaseFNZ)) * 100
         logger.info(f"   ✅ JOIN completado: {registros_antes:,} → {len(BaseFNZ):,} registros")
         logger.info(f"   Matches encontrados: {matches:,} ({porcentaje_match:.1f}%)")
@@ -119,8 +150,9 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
     logger.info("-"*40)
     if df_recaudos is not None and len(df_recaudos) > 0:
         registros_antes = len(BaseFNZ)
-        BaseFNZ = BaseFNZ.merge(df_recaudos, on=['cedula_numero', 'corte'], how='left', suffixes=('', '_recaudos'))
-        matches = BaseFNZ['capitalrec'].notna().sum() if 'capitalrec' in BaseFNZ.columns else 0
+        BaseFNZ, matches = _merge_con_conteo(
+            BaseFNZ, df_recaudos, ['cedula_numero', 'corte'], '_recaudos', columnas_join.get('RECAUDOS')
+        )
         porcentaje_match = (matches / len(BaseFNZ)) * 100
         logger.info(f"   ✅ JOIN completado: {registros_antes:,} → {len(BaseFNZ):,} registros")
         logger.info(f"   Matches encontrados: {matches:,} ({porcentaje_match:.1f}%)")
@@ -128,32 +160,10 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
         logger.warning("   ⚠️ Recaudos no disponible - JOIN omitido")
     logger.info("")
 
-    # ========================================
-    # FILTRO 6: Eliminar Estado Desembolsos
-    # ========================================
-    logger.info("6️⃣ FILTRO: Eliminando Estado Desembolsos")
-    logger.info("-"*40)
-    if 'estado_desembolsos' in dict_auxiliares:
-        estado_desemp = dict_auxiliares['estado_desembolsos']
-        if 'cedula_numero' not in estado_desemp.columns:
-            if 'cedula' in estado_desemp.columns and 'numero' in estado_desemp.columns:
-                estado_desemp['cedula']   = estado_desemp['cedula'].astype(str).fillna('').str.strip()
-                estado_desemp['numero']   = estado_desemp['numero'].astype(str).fillna('').str.strip()
-                estado_desemp['cedula_numero'] = estado_desemp['cedula'] + '-' + estado_desemp['numero']
-        registros_antes = len(BaseFNZ)
-        BaseFNZ = BaseFNZ[~BaseFNZ['cedula_numero'].isin(estado_desemp['cedula_numero'])]
-        eliminados = registros_antes - len(BaseFNZ)
-        porcentaje_eliminado = (eliminados / registros_antes) * 100
-        logger.info(f"   ✅ Filtro aplicado: {registros_antes:,} → {len(BaseFNZ):,} registros")
-        logger.info(f"   Eliminados: {eliminados:,} ({porcentaje_eliminado:.1f}%)")
-    else:
-        logger.warning("   ⚠️ Estado Desembolsos no disponible - Filtro omitido")
-    logger.info("")
-
     # ========================================
     # ELIMINAR DUPLICADOS MÁS RECIENTES
     # ========================================
-    logger.info("7️⃣ Eliminando duplicados más recientes de BaseFNZ")
+    logger.info("6️⃣ Eliminando duplicados más recientes de BaseFNZ")
     logger.info("-"*40)
     registros_antes = len(BaseFNZ)
     BaseFNZ = eliminar_duplicados_mas_recientes(BaseFNZ)
@@ -174,27 +184,76 @@ def unir_datasets(df_fnz007, df_ac, df_fnz001, df_edades, df_r05, df_recaudos, d
 
 
 
+def _limpiar_llave(serie: pd.Series) -> pd.Series:
+    """
+    Normaliza una columna usada para armar cedula_numero (texto sin espacios).
+    Con STRING_DTYPE los nulos siguen siendo NA hasta el fillna final (con
+    astype(str) en pandas < 3 saldrían como 'nan'), así que quedan como ''
+    y la llave nunca es NaN.
+    """
+    return serie.astype(STRING_DTYPE).str.strip().fillna('')
+
+
+def _columnas_necesarias(df_der: pd.DataFrame, on, columnas) -> list:
+    """
+    Columnas del DataFrame derecho que se llevan al merge: las llaves y las
+    columnas configuradas que existan en él.
+    """
+    llaves = [on] if isinstance(on, str) else list(on)
+    return llaves + [col for col in columnas if col in df_der.columns and col not in llaves]
+
+
+def _merge_con_conteo(df_izq: pd.DataFrame, df_der: pd.DataFrame, on, sufijo: str, columnas=None):
+    """
+    Left join que además devuelve cuántos registros encontraron pareja.
+
+    Usa el indicador del propio merge (categórico, 1 byte por fila) en lugar
+    de recorrer una columna arbitraria del resultado con notna().sum().
+    Si se pasan columnas, del DataFrame derecho solo se toman esas (y las llaves).
+    """
+    if columnas is not None:
+        df_der = df_der[_columnas_necesarias(df_der, on, columnas)]
+    resultado = df_izq.merge(
+        df_der,
+        on=on,
+        how='left',
+        suffixes=('', sufijo),
+        indicator='_merge'
+    )
+    indicador = resultado.pop('_merge')
+    matches = int((indicador == 'both').sum())
+    return resultado, matches
+
+
 # FALTA AGREGAR en procesador.py o fnz007.py
 
 def eliminar_duplicados_mas_recientes(df: pd.DataFrame) -> pd.DataFrame:
     """
     Elimina el registro más reciente de cada cedula_numero duplicada.
+
+    Un solo lexsort estable sobre (código de cedula_numero, corte) reemplaza
+    el transform('count') + sort_values + cumcount y las dos columnas
+    auxiliares: el último de cada tramo es el más reciente. Se conserva el
+    orden de salida de sort_values (cedula_numero y corte ascendentes, nulos
+    al final) y las llaves nulas nunca se eliminan.
     """
-    df = df.copy()
-    
-    # Contar duplicados
-    df['total'] = df.groupby('cedula_numero')['cedula_numero'].transform('count')
-    
-    # Ordenar por corte dentro de cada grupo
-    df = df.sort_values(['cedula_numero', 'corte'])
-    
-    # Marcar el más reciente
-    df['es_mas_reciente'] = df.groupby('cedula_numero').cumcount() == (df['total'] - 1)
-    
-    # Filtrar: eliminar SOLO si es duplicado Y es el más reciente
-    df = df[~((df['total'] > 1) & df['es_mas_reciente'])]
-    
-    # Limpiar columnas auxiliares
-    df = df.drop(columns=['total', 'es_mas_reciente'])
-    
-    return df
\ No newline at end of file
+    # Códigos en orden lexicográfico; los nulos (-1) van al final
+    codigos, unicos = pd.factorize(df['cedula_numero'], sort=True)
+    codigos = np.where(codigos < 0, len(unicos), codigos)
+
+    # NaT ordena al final, igual que en sort_values
+    tiempos = pd.to_datetime(df['corte']).to_numpy().view(np.int64).copy()
+    tiempos[tiempos == np.iinfo(np.int64).min] = np.iinfo(np.int64).max
+
+    orden = np.lexsort((tiempos, codigos))
+    codigos_ordenados = codigos[orden]
+
+    # Último de cada tramo con más de un registro (y llave no nula)
+    n = len(orden)
+    ultimo = np.ones(n, dtype=bool)
+    ultimo[:-1] = codigos_ordenados[1:] != codigos_ordenados[:-1]
+    primero = np.ones(n, dtype=bool)
+    primero[1:] = codigos_ordenados[1:] != codigos_ordenados[:-1]
+    eliminar = ultimo & ~primero & (codigos_ordenados < len(unicos))
+
+    return df.take(orden[~eliminar])
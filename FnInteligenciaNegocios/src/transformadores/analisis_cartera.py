@@ -1,6 +1,24 @@
 import pandas as pd
 import numpy as np
-from .base import logger, convertir_columnas_minusculas, crear_llave_cedula_numero, eliminar_columnas
+from .base import logger, convertir_columnas_minusculas, crear_llave_cedula_numero, eliminar_columnas, optimizar_dtypes, mascara_en
+
+# Límite superior (inclusivo) de cada tramo de 'diasatras': 0 → A1, (0, 30] → A2, ...
+LIMITES_MORA = np.array([0, 30, 60, 90, 120, 150, 180, 210])
+CATEGORIAS_MORA = np.array(['A1', 'A2', 'B1', 'B2', 'C1', 'C2', 'D1', 'D2', 'EE'], dtype=object)
+
+
+def codigos_mora(dias) -> np.ndarray:
+    """
+    Código (posición en CATEGORIAS_MORA) del tramo de mora de cada valor de
+    días de atraso, con una sola pasada de searchsorted. Negativos y nulos
+    quedan en -1 (sin categoría).
+    """
+    dias = pd.to_numeric(pd.Series(dias), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    codigos = np.searchsorted(LIMITES_MORA, dias, side='left').astype(np.int8)
+    codigos[np.isnan(dias) | (dias < 0)] = -1
+    return codigos
+
+
 #NOMBRE DIAS ATRAS ESTA MAL
 def filtrar_finansuenos_ac(df_ac: pd.DataFrame) -> pd.DataFrame:
     """
@@ -11,7 +29,9 @@ def filtrar_finansuenos_ac(df_ac: pd.DataFrame) -> pd.DataFrame:
     registros_antes = len(df_ac)
     
     if 'reg' in df_ac.columns:
-        df_filtrado = df_ac[df_ac['reg'] == 'FINANSUEÑOS'].copy()
+        # Máscara en ndarray (sobre los códigos si 'reg' es categórica) y sin .copy():
+        # procesar_analisis_cartera materializa el resultado una sola vez
+        df_filtrado = df_ac.loc[mascara_en(df_ac['reg'], ['FINANSUEÑOS'])]
         logger.info(f"Registros antes: {registros_antes:,}, Registros después: {len(df_filtrado):,}")
         return df_filtrado
     else:
@@ -23,10 +43,10 @@ def procesar_analisis_cartera(df: pd.DataFrame) -> pd.DataFrame:
     Realiza la limpieza y preparación inicial del dataframe de Análisis de Cartera.
     """
     logger.info("Iniciando limpieza y procesamiento de Análisis de Cartera...")
-    df_proc = df.copy()
     
-    # 1. Convertir nombres de columnas a minúsculas
-    df_proc = convertir_columnas_minusculas(df_proc, "Análisis de Cartera")
+    # 1. Convertir nombres de columnas a minúsculas sobre una copia superficial
+    #    (no copia datos; el DataFrame del llamador conserva sus nombres)
+    df_proc = convertir_columnas_minusculas(df.copy(deep=False), "Análisis de Cartera")
     logger.info(f"Columnas después de convertir a minúsculas: {df_proc.columns.tolist()}")
     # 2. LIMPIAR cedula y numero ANTES de crear la llave
     from .base import limpiar_columnas_numericas_como_string
@@ -41,13 +61,40 @@ def procesar_analisis_cartera(df: pd.DataFrame) -> pd.DataFrame:
     ]
     
     df_proc = eliminar_columnas(df_proc, columnas_a_eliminar, "Análisis de Cartera")
+    # Reducir dtypes ya sin las columnas descartadas
+    df_proc = optimizar_dtypes(df_proc, "Análisis de Cartera")
 
     # 4. Crear la llave 'cedula_numero'
     df_proc = crear_llave_cedula_numero(df_proc, 'cedula', 'numero')
 
+    # 5. Tipar 'diasatras' una sola vez (crear_columna_mora_ac lo lee ya numérico)
+    if 'diasatras' in df_proc.columns:
+        df_proc['diasatras'] = pd.to_numeric(df_proc['diasatras'], errors='coerce', downcast='integer')
+
     logger.info("Limpieza y procesamiento de Análisis de Cartera completado.")
     return df_proc
 
+def _concatenar_por_columna(df_arriba: pd.DataFrame, df_abajo: pd.DataFrame, columnas) -> pd.DataFrame:
+    """
+    Apila dos DataFrames concatenando los arreglos de cada columna.
+    Las columnas con dtypes de extensión o distintos entre ambos lados
+    se combinan con pd.concat para que pandas resuelva la promoción.
+    """
+    datos = {}
+    for col in columnas:
+        if col not in df_arriba.columns or col not in df_abajo.columns:
+            continue
+        serie_arriba = df_arriba[col]
+        serie_abajo = df_abajo[col]
+        if (isinstance(serie_arriba.dtype, np.dtype)
+                and serie_arriba.dtype == serie_abajo.dtype
+                and serie_arriba.dtype.kind != 'O'):
+            datos[col] = np.concatenate([serie_arriba.to_numpy(), serie_abajo.to_numpy()])
+        else:
+            datos[col] = pd.concat([serie_arriba, serie_abajo], ignore_index=True)
+    return pd.DataFrame(datos, copy=False)
+
+
 def manejar_duplicados_ac(df: pd.DataFrame) -> pd.DataFrame:
     """
     Maneja los registros duplicados en el DataFrame de Análisis de Cartera.
@@ -63,32 +110,28 @@ def manejar_duplicados_ac(df: pd.DataFrame) -> pd.DataFrame:
     # ========================================
     # PASO 1: Identificar duplicados (IGUAL QUE R)
     # ========================================
-    duplicados_info = df.groupby(['cedula_numero', 'corte']).size().reset_index(name='n')
-    duplicados_info = duplicados_info[duplicados_info['n'] > 1]
-    
-    num_duplicados = len(duplicados_info)
-    logger.info(f"   📊 Grupos duplicados encontrados: {num_duplicados:,}")
+    # Una sola pasada de hash: marca TODAS las filas de cada grupo repetido.
+    # Las llaves con nulos no forman grupo (groupby las descarta), así que
+    # esas filas se conservan como únicas.
+    llaves = ['cedula_numero', 'corte']
+    mascara_duplicados = (
+        df.duplicated(subset=llaves, keep=False).to_numpy()
+        & df[llaves].notna().all(axis=1).to_numpy()
+    )
     
-    if num_duplicados == 0:
+    if not mascara_duplicados.any():
+        logger.info("   📊 Grupos duplicados encontrados: 0")
         logger.info("   ✅ No hay duplicados - DataFrame sin cambios")
         return df
     
     # ========================================
     # PASO 2: Separar duplicados de únicos
     # ========================================
-    # Crear máscara de duplicados
-    df_con_marcador = df.merge(
-        duplicados_info[['cedula_numero', 'corte']],
-        on=['cedula_numero', 'corte'],
-        how='left',
-        indicator=True
-    )
-    
     # Registros únicos (NO están en duplicados)
-    df_unicos = df_con_marcador[df_con_marcador['_merge'] == 'left_only'].drop(columns=['_merge'])
+    df_unicos = df.loc[~mascara_duplicados]
     
     # Registros duplicados (SÍ están en duplicados)
-    df_duplicados = df_con_marcador[df_con_marcador['_merge'] == 'both'].drop(columns=['_merge'])
+    df_duplicados = df.loc[mascara_duplicados]
     
     logger.info(f"   📊 Registros únicos: {len(df_unicos):,}")
     logger.info(f"   📊 Registros duplicados a agrupar: {len(df_duplicados):,}")
@@ -96,33 +139,39 @@ def manejar_duplicados_ac(df: pd.DataFrame) -> pd.DataFrame:
     # ========================================
     # PASO 3: Agrupar SOLO los duplicados
     # ========================================
-    # Identificar columnas numéricas y no numéricas
-    columnas_numericas = df_duplicados.select_dtypes(include=np.number).columns.tolist()
-    columnas_no_numericas = df_duplicados.select_dtypes(exclude=np.number).columns.tolist()
-
-    # Crear diccionario de agregación
-    agg_dict = {}
-    for col in columnas_numericas:
-        agg_dict[col] = 'sum'
-    
-    for col in columnas_no_numericas:
-        if col not in ['cedula_numero', 'corte']:
-            agg_dict[col] = 'first'
+    # Numéricas se suman y el resto toma el primer valor: dos agregaciones
+    # homogéneas (rutas vectorizadas) en lugar de un dict columna a columna
+    # Una sola pasada por los dtypes (bool no cuenta como numérica, igual que np.number)
+    columnas_numericas, columnas_no_numericas = [], []
+    for col, tipo in df_duplicados.dtypes.items():
+        if col in llaves:
+            continue
+        if pd.api.types.is_numeric_dtype(tipo) and not pd.api.types.is_bool_dtype(tipo):
+            columnas_numericas.append(col)
+        else:
+            columnas_no_numericas.append(col)
 
-    # Agrupar duplicados
-    df_duplicados_agrupados = df_duplicados.groupby(['cedula_numero', 'corte'], as_index=False).agg(agg_dict)
+    agrupado = df_duplicados.groupby(llaves, sort=False, observed=True)
+    partes = []
+    if columnas_numericas:
+        partes.append(agrupado[columnas_numericas].sum())
+    if columnas_no_numericas:
+        partes.append(agrupado[columnas_no_numericas].first())
+
+    if partes:
+        df_duplicados_agrupados = pd.concat(partes, axis=1).reset_index()
+    else:
+        df_duplicados_agrupados = df_duplicados[llaves].drop_duplicates()
     
+    logger.info(f"   📊 Grupos duplicados encontrados: {len(df_duplicados_agrupados):,}")
     logger.info(f"   📊 Duplicados agrupados: {len(df_duplicados):,} → {len(df_duplicados_agrupados):,}")
     
     # ========================================
     # PASO 4: Reconstruir DataFrame (IGUAL QUE R)
     # ========================================
-    # Combinar únicos + duplicados agrupados
-    df_final = pd.concat([df_unicos, df_duplicados_agrupados], ignore_index=True)
-    
-    # Reordenar columnas para que coincidan con el original
-    columnas_finales = [col for col in df.columns if col in df_final.columns]
-    df_final = df_final[columnas_finales]
+    # Combinar únicos + duplicados agrupados columna por columna, ya en el
+    # orden original, sin pasar por la consolidación de bloques de pd.concat
+    df_final = _concatenar_por_columna(df_unicos, df_duplicados_agrupados, df.columns)
     
     registros_despues = len(df_final)
     logger.info(f"   ✅ DataFrame reconstruido: {registros_antes:,} → {registros_despues:,}")
@@ -140,25 +189,15 @@ def crear_columna_mora_ac(df: pd.DataFrame) -> pd.DataFrame:
         logger.warning("La columna 'diasatras' no se encuentra. No se puede crear 'mora'.")
         return df
 
-    df_mora = df.copy()
-    df_mora['diasatras'] = pd.to_numeric(df_mora['diasatras'], errors='coerce')
+    df_mora = df.copy(deep=False)
+    if not pd.api.types.is_numeric_dtype(df_mora['diasatras']):
+        df_mora['diasatras'] = pd.to_numeric(df_mora['diasatras'], errors='coerce')
     
-    conditions = [
-        (df_mora['diasatras'] == 0),
-        (df_mora['diasatras'] > 0) & (df_mora['diasatras'] <= 30),
-        (df_mora['diasatras'] > 30) & (df_mora['diasatras'] <= 60),
-        (df_mora['diasatras'] > 60) & (df_mora['diasatras'] <= 90),
-        (df_mora['diasatras'] > 90) & (df_mora['diasatras'] <= 120),
-        (df_mora['diasatras'] > 120) & (df_mora['diasatras'] <= 150),
-        (df_mora['diasatras'] > 150) & (df_mora['diasatras'] <= 180),
-        (df_mora['diasatras'] > 180) & (df_mora['diasatras'] <= 210),
-        (df_mora['diasatras'] > 210)
-    ]
-
-    choices = ['A1', 'A2', 'B1', 'B2', 'C1', 'C2', 'D1', 'D2', 'EE']
-    df_mora['mora'] = np.select(conditions, choices, default=None)
+    # Categórica directa desde los códigos del tramo (1 byte por fila)
+    codigos = codigos_mora(df_mora['diasatras'])
+    df_mora['mora'] = pd.Categorical.from_codes(codigos, categories=CATEGORIAS_MORA)
 
-    no_categorizados = df_mora['mora'].isnull().sum()
+    no_categorizados = int((codigos < 0).sum())
     if no_categorizados > 0:
         logger.warning(f"{no_categorizados} registros no pudieron ser categorizados en 'mora'.")
 
@@ -5,12 +5,136 @@ from src.utilidades.logger import configurar_logger
 # Logger común para todos los transformadores
 logger = configurar_logger('finnovarisk.transformadores')
 
+# Copy-on-Write: las copias superficiales de los procesar_* nunca comparten
+# escrituras con el DataFrame del llamador. En pandas >= 3 ya está siempre
+# activo y la opción quedó deprecada, así que solo se fija en versiones previas
+if int(pd.__version__.split('.')[0]) < 3:
+    try:
+        pd.set_option('mode.copy_on_write', True)
+    except (KeyError, AttributeError):
+        pass
+
+# Texto de identificadores: buffers Arrow contiguos si pyarrow está instalado
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    HAS_PYARROW = True
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    HAS_PYARROW = False
+    STRING_DTYPE = 'string'
+
 def convertir_columnas_minusculas(df: pd.DataFrame, nombre_dataset: str) -> pd.DataFrame:
-    """Convierte nombres de columnas a minúsculas"""
-    df_proc = df.copy()
-    df_proc.columns = [col.lower() for col in df_proc.columns]
+    """Convierte nombres de columnas a minúsculas (modifica df en sitio, sin copiar datos)"""
+    # Si ya vienen en minúsculas no se reconstruye el Index
+    if all(not isinstance(col, str) or col == col.lower() for col in df.columns):
+        logger.info(f"Columnas de {nombre_dataset} ya están en minúsculas.")
+        return df
+    # Las etiquetas que no son texto (p. ej. 2024 desde read_excel) se dejan igual
+    df.columns = df.columns.map(lambda c: c.lower() if isinstance(c, str) else c)
     logger.info(f"Nombres de columnas de {nombre_dataset} convertidos a minúsculas.")
-    return df_proc
+    return df
+
+
+def renombrar_columnas(df: pd.DataFrame, renombres: dict) -> dict:
+    """
+    Renombra columnas en sitio con un solo map sobre el Index (las que no
+    están en 'renombres' se conservan).
+    
+    Returns:
+        Diccionario con los renombres que sí se aplicaron
+    """
+    nuevas = df.columns.map(lambda col: renombres.get(col, col))
+    aplicados = {antes: despues for antes, despues in zip(df.columns, nuevas) if antes != despues}
+    if aplicados:
+        df.columns = nuevas
+    return aplicados
+
+
+def optimizar_dtypes(df: pd.DataFrame, nombre_dataset: str,
+                     umbral_categoria: float = 0.5) -> pd.DataFrame:
+    """
+    Reduce la memoria del DataFrame (modifica df en sitio).
+
+    - Enteros → el tipo entero más pequeño que contiene sus valores
+    - Texto (object/string) con pocos valores distintos → category
+
+    Los flotantes no se tocan: float32 pierde los centavos en montos
+    grandes y acumula error al sumar.
+
+    Args:
+        df: DataFrame
+        nombre_dataset: Nombre para los logs
+        umbral_categoria: Proporción máxima de valores únicos para convertir
+            una columna de texto a category (0 desactiva la conversión)
+
+    Returns:
+        DataFrame con dtypes reducidos
+    """
+    memoria_antes = df.memory_usage(deep=True).sum()
+    total = len(df)
+
+    for col in df.columns:
+        serie = df[col]
+        # Texto: object o StringDtype (el dtype 'str' por defecto en pandas >= 3)
+        es_texto = serie.dtype == object or isinstance(serie.dtype, pd.StringDtype)
+        if pd.api.types.is_integer_dtype(serie.dtype) and isinstance(serie.dtype, np.dtype):
+            df[col] = pd.to_numeric(serie, downcast='integer')
+        elif es_texto and umbral_categoria > 0 and total > 0:
+            if serie.nunique(dropna=False) / total < umbral_categoria:
+                df[col] = serie.astype('category')
+
+    memoria_despues = df.memory_usage(deep=True).sum()
+    logger.info(
+        f"Dtypes de {nombre_dataset} optimizados: "
+        f"{memoria_antes / 1024**2:,.1f} MB → {memoria_despues / 1024**2:,.1f} MB"
+    )
+    return df
+
+
+def mascara_en(serie: pd.Series, valores) -> np.ndarray:
+    """
+    Máscara booleana serie.isin(valores).
+    Si la serie es categórica se evalúan solo las categorías y el resultado
+    se traduce con los códigos enteros (sin hashear texto fila a fila).
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        en_categorias = np.append(serie.cat.categories.isin(valores), False)
+        return en_categorias[codigos]
+    return serie.isin(valores).to_numpy()
+
+
+def _limpiar_valor_identificador(valor):
+    """Versión escalar de la limpieza; se usa solo para casos raros (bool, enteros enormes)."""
+    # Caso 1: None o NaN
+    if pd.isna(valor):
+        return ""
+    
+    # Caso 2: Es numérico (int o float)
+    if isinstance(valor, (int, np.integer)):
+        return str(int(valor))
+    
+    if isinstance(valor, (float, np.floating)):
+        # Convertir a int si no tiene decimales significativos
+        if valor == int(valor):
+            return str(int(valor))
+        else:
+            return str(valor)
+    
+    # Caso 3: Es string
+    valor_str = str(valor).strip()
+    
+    # Si es un número en formato string con .0, quitarlo
+    try:
+        valor_float = float(valor_str)
+        if valor_float == int(valor_float):
+            return str(int(valor_float))
+        else:
+            return str(valor_float)
+    except (ValueError, OverflowError):
+        # No es un número, devolver como está (limpio)
+        return valor_str
 
 
 def limpiar_columna_identificador(serie: pd.Series) -> pd.Series:
@@ -24,44 +148,118 @@ def limpiar_columna_identificador(serie: pd.Series) -> pd.Series:
     - None/NaN → ""
     - "  123  " → "123"
     
+    Vectorizado según el dtype de la serie: los enteros se formatean
+    directamente y el texto se interpreta una sola vez con pd.to_numeric,
+    sin llamar a una función Python por cada valor.
+    
     Args:
         serie: Serie de pandas a limpiar
         
     Returns:
         Serie limpia como strings
     """
-    def limpiar_valor(valor):
-        # Caso 1: None o NaN
-        if pd.isna(valor):
-            return ""
-        
-        # Caso 2: Es numérico (int o float)
-        if isinstance(valor, (int, np.integer)):
-            return str(int(valor))
-        
-        if isinstance(valor, (float, np.floating)):
-            # Convertir a int si no tiene decimales significativos
-            if valor == int(valor):
-                return str(int(valor))
-            else:
-                return str(valor)
-        
-        # Caso 3: Es string
-        valor_str = str(valor).strip()
-        
-        # Si es un número en formato string con .0, quitarlo
-        try:
-            valor_float = float(valor_str)
-            if valor_float == int(valor_float):
-                return str(int(valor_float))
-            else:
-                return str(valor_float)
-        except (ValueError, OverflowError):
-            # No es un número, devolver como está (limpio)
-            return valor_str
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.apply(_limpiar_valor_identificador)
     
-    # Aplicar limpieza a toda la serie
-    return serie.apply(limpiar_valor)
+    # Caso rápido: enteros sin nulos
+    if pd.api.types.is_integer_dtype(serie) and not serie.hasnans:
+        return pd.Series(serie.to_numpy().astype(str).astype(object), index=serie.index, name=serie.name)
+
+    # Caso rápido: float con solo enteros + NaN (cédulas leídas como float por los nulos)
+    if pd.api.types.is_float_dtype(serie) and isinstance(serie.dtype, np.dtype):
+        numeros = serie.to_numpy()
+        nulos = np.isnan(numeros)
+        validos = numeros[~nulos]
+        if (np.abs(validos) < 2**63).all() and (validos == np.trunc(validos)).all():
+            resultado = np.full(len(serie), '', dtype=object)
+            resultado[~nulos] = validos.astype(np.int64).astype(str)
+            return pd.Series(resultado, index=serie.index, name=serie.name)
+
+    nulos = serie.isna().to_numpy()
+    
+    if pd.api.types.is_numeric_dtype(serie):
+        texto = None
+        numeros = serie.to_numpy(dtype='float64', na_value=np.nan)
+    else:
+        texto = serie.astype(str).str.strip().to_numpy(dtype=object)
+        numeros = pd.to_numeric(pd.Series(texto), errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    
+    validos = ~nulos
+    finitos = validos & np.isfinite(numeros)
+    enteros = finitos & (numeros == np.trunc(numeros))
+    representables = enteros & (np.abs(numeros) < 2**63)
+    decimales = finitos & ~enteros
+    
+    resultado = np.full(len(serie), '', dtype=object)
+    
+    # Numéricos enteros (1007518.0 / "1007518.0") → "1007518"
+    resultado[representables] = numeros[representables].astype(np.int64).astype(str)
+    # Numéricos con decimales → str(float)
+    resultado[decimales] = numeros[decimales].astype(str)
+    
+    # No numéricos: texto limpio tal cual
+    no_numericos = validos & ~finitos
+    if texto is not None:
+        resultado[no_numericos] = texto[no_numericos]
+    else:
+        resultado[no_numericos] = numeros[no_numericos].astype(str)
+    
+    # Enteros fuera de int64: se delegan a la versión escalar
+    fuera_de_rango = enteros & ~representables
+    if fuera_de_rango.any():
+        resultado[fuera_de_rango] = [
+            _limpiar_valor_identificador(v) for v in serie.to_numpy(dtype=object)[fuera_de_rango]
+        ]
+    
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+def limpiar_identificador_por_unicos(serie: pd.Series) -> pd.Series:
+    """
+    Igual que limpiar_columna_identificador, pero limpia cada valor distinto
+    una sola vez (las cédulas se repiten mucho) y devuelve una categórica.
+    Valores crudos distintos que quedan iguales al limpiar (1.0 y "1")
+    comparten categoría. Las categorías son STRING_DTYPE (Arrow si está
+    disponible), así que los .str.* y uniones posteriores no pasan por object.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    limpios = limpiar_columna_identificador(pd.Series(unicos))
+    codigos_limpios, categorias = pd.factorize(limpios)
+    categorias = pd.Index(categorias, dtype=STRING_DTYPE)
+    return pd.Series(
+        pd.Categorical.from_codes(codigos_limpios[codigos], categories=categorias),
+        index=serie.index, name=serie.name
+    )
+
+
+def convertir_a_fecha(serie: pd.Series) -> pd.Series:
+    """
+    pd.to_datetime(serie, errors='coerce') parseando cada fecha distinta una
+    sola vez (los cortes se repiten en todas las filas del mes).
+    
+    Se intenta primero ISO 8601 (ruta rápida en C, sin dateutil); lo que no
+    calce se pasa al parser general, igual que antes.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == 0:
+        # Columna vacía o toda nula: no hay nada que indexar
+        return pd.to_datetime(serie, errors='coerce')
+    unicos = pd.Series(unicos)
+    fechas = pd.to_datetime(unicos, format='ISO8601', errors='coerce')
+    
+    pendientes = (fechas.isna() & unicos.notna()).to_numpy()
+    if pendientes.any():
+        fechas = fechas.astype(object)
+        fechas[pendientes] = pd.to_datetime(unicos[pendientes], errors='coerce')
+        fechas = pd.to_datetime(fechas)
+    
+    valores = fechas.to_numpy()
+    resultado = valores[codigos]
+    resultado[codigos < 0] = np.datetime64('NaT')
+    return pd.Series(resultado, index=serie.index, name=serie.name)
 
 
 def limpiar_columnas_numericas_como_string(df: pd.DataFrame, columnas: list) -> pd.DataFrame:
@@ -75,12 +273,12 @@ def limpiar_columnas_numericas_como_string(df: pd.DataFrame, columnas: list) ->
     Returns:
         DataFrame con columnas limpias
     """
-    df_proc = df.copy()
+    df_proc = df.copy(deep=False)
     
     for col in columnas:
         if col in df_proc.columns:
             antes = df_proc[col].dtype
-            df_proc[col] = limpiar_columna_identificador(df_proc[col])
+            df_proc[col] = limpiar_columna_identificador(df_proc[col]).astype(STRING_DTYPE)
             
             # Contar cuántos se limpiaron
             if antes in ['float64', 'float32']:
@@ -89,6 +287,21 @@ def limpiar_columnas_numericas_como_string(df: pd.DataFrame, columnas: list) ->
     return df_proc
 
 
+def unir_columnas_texto(izquierda: pd.Series, derecha: pd.Series, separador: str) -> pd.Series:
+    """
+    Une dos columnas de texto elemento a elemento con un separador.
+    Con pyarrow la unión corre sobre los buffers UTF-8 (sin objetos Python).
+    """
+    if HAS_PYARROW:
+        unido = pc.binary_join_element_wise(
+            pa.array(izquierda, type=pa.string()),
+            pa.array(derecha, type=pa.string()),
+            separador
+        )
+        return pd.Series(pd.arrays.ArrowStringArray(unido), index=izquierda.index)
+    return izquierda.str.cat(derecha, sep=separador)
+
+
 def crear_llave_cedula_numero(df: pd.DataFrame, col_cedula: str, col_numero: str, 
                                separador: str = '-') -> pd.DataFrame:
     """
@@ -103,7 +316,7 @@ def crear_llave_cedula_numero(df: pd.DataFrame, col_cedula: str, col_numero: str
     Returns:
         DataFrame con columna cedula_numero creada
     """
-    df_proc = df.copy()
+    df_proc = df.copy(deep=False)
     
     if col_cedula not in df_proc.columns:
         logger.error(f"❌ Columna '{col_cedula}' no encontrada")
@@ -118,13 +331,11 @@ def crear_llave_cedula_numero(df: pd.DataFrame, col_cedula: str, col_numero: str
     # 🔧 PASO 1: LIMPIAR ambas columnas
     logger.info(f"  🧹 Limpiando '{col_cedula}' y '{col_numero}'...")
     
-    df_proc[col_cedula] = limpiar_columna_identificador(df_proc[col_cedula])
-    df_proc[col_numero] = limpiar_columna_identificador(df_proc[col_numero])
+    df_proc[col_cedula] = limpiar_columna_identificador(df_proc[col_cedula]).astype(STRING_DTYPE)
+    df_proc[col_numero] = limpiar_columna_identificador(df_proc[col_numero]).astype(STRING_DTYPE)
     
     # 🔧 PASO 2: Crear llave
-    df_proc['cedula_numero'] = (
-        df_proc[col_cedula] + separador + df_proc[col_numero]
-    )
+    df_proc['cedula_numero'] = unir_columnas_texto(df_proc[col_cedula], df_proc[col_numero], separador)
     
     # 🔧 PASO 3: Verificar resultados
     llaves_vacias = (df_proc['cedula_numero'] == separador).sum()
@@ -145,16 +356,82 @@ def crear_llave_cedula_numero(df: pd.DataFrame, col_cedula: str, col_numero: str
     for i, val in enumerate(ejemplos['cedula_numero'], 1):
         logger.info(f"        {i}. {val}")
     
+    # 🔧 PASO 5: Guardar como categórica (códigos enteros para groupby/merge)
+    df_proc['cedula_numero'] = df_proc['cedula_numero'].astype('category')
+    
     return df_proc
 
 
+def columnas_presentes(df: pd.DataFrame, columnas) -> list:
+    """Columnas de 'columnas' que existen en df, en el orden de 'columnas' (un solo set de df.columns)"""
+    columnas_df = set(df.columns)
+    return [col for col in columnas if col in columnas_df]
+
+
 def eliminar_columnas(df: pd.DataFrame, columnas_a_eliminar: list, nombre_dataset: str) -> pd.DataFrame:
-    """Elimina columnas especificadas del DataFrame"""
-    df_proc = df.copy()
-    columnas_encontradas = [col for col in columnas_a_eliminar if col in df_proc.columns]
+    """Elimina columnas especificadas del DataFrame (un solo drop, sin copia previa)"""
+    columnas_encontradas = columnas_presentes(df, columnas_a_eliminar)
+    
+    if not columnas_encontradas:
+        return df
+    
+    df_proc = df.drop(columns=columnas_encontradas)
+    logger.info(f"Se eliminaron {len(columnas_encontradas)} columnas de {nombre_dataset}: {', '.join(columnas_encontradas)}")
+    
+    return df_proc
+
+
+def sumar_por_llave_y_corte(llave: pd.Series, corte: pd.Series, valores: pd.Series,
+                            mascara: np.ndarray = None) -> pd.DataFrame:
+    """
+    Equivale a df[mascara].groupby([llave, corte])[valores].sum() sin hashing
+    y sin materializar el DataFrame filtrado: empaca (código de llave, código
+    de corte) en un solo int64, lo ordena, ubica el inicio de cada tramo y
+    suma cada tramo con np.add.reduceat. Igual que groupby, descarta llaves o
+    cortes nulos y devuelve los grupos ordenados.
+    
+    Args:
+        llave: Columna llave (categórica o no), p. ej. cedula_numero
+        corte: Columna de fechas de corte
+        valores: Columna a sumar; su nombre se conserva en el resultado
+        mascara: Filas a considerar; None usa todas
+        
+    Returns:
+        DataFrame con columnas llave, corte y valores
+    """
+    if isinstance(llave.dtype, pd.CategoricalDtype):
+        codigos = llave.cat.codes.to_numpy()
+        categorias = llave.cat.categories
+    else:
+        codigos, categorias = pd.factorize(llave, sort=True)
+    
+    # Los cortes distintos son pocos (uno por mes): códigos ordenados 0..n-1
+    codigos_corte, cortes = pd.factorize(pd.to_datetime(corte), sort=True)
+    numeros = valores.to_numpy()
+    
+    validos = (codigos >= 0) & (codigos_corte >= 0)
+    if mascara is not None:
+        validos &= mascara
+    
+    # Llave compuesta entera: ordenar por ella = ordenar por (llave, corte)
+    compuesta = codigos[validos].astype(np.int64) * max(len(cortes), 1) + codigos_corte[validos]
+    numeros = numeros[validos]
+    
+    orden = np.argsort(compuesta, kind='stable')
+    compuesta, numeros = compuesta[orden], numeros[orden]
+    
+    inicio_tramo = np.ones(len(compuesta), dtype=bool)
+    inicio_tramo[1:] = compuesta[1:] != compuesta[:-1]
+    inicios = np.flatnonzero(inicio_tramo)
     
-    if columnas_encontradas:
-        df_proc.drop(columns=columnas_encontradas, inplace=True)
-        logger.info(f"Se eliminaron {len(columnas_encontradas)} columnas de {nombre_dataset}: {', '.join(columnas_encontradas)}")
+    codigos_grupo, cortes_grupo = np.divmod(compuesta[inicios], max(len(cortes), 1))
+    if isinstance(llave.dtype, pd.CategoricalDtype):
+        llaves = pd.Categorical.from_codes(codigos_grupo, dtype=llave.dtype)
+    else:
+        llaves = categorias[codigos_grupo]
     
-    return df_proc
\ No newline at end of file
+    return pd.DataFrame({
+        llave.name: llaves,
+        corte.name: cortes.take(cortes_grupo),
+        valores.name: np.add.reduceat(numeros, inicios) if len(inicios) else numeros[:0],
+    })
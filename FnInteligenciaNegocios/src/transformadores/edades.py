@@ -1,5 +1,5 @@
 import pandas as pd
-from .base import logger, convertir_columnas_minusculas, crear_llave_cedula_numero
+from .base import logger, convertir_columnas_minusculas, crear_llave_cedula_numero, optimizar_dtypes, mascara_en
 
 def procesar_edades(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -10,11 +10,14 @@ def procesar_edades(df: pd.DataFrame) -> pd.DataFrame:
         return None
 
     logger.info("Iniciando limpieza y procesamiento de Edades...")
-    df_proc = df.copy()
+    # Copia superficial: optimizar_dtypes y los pasos siguientes asignan
+    # columnas sin tocar el DataFrame del llamador ni duplicar los datos
+    df_proc = df.copy(deep=False)
     registros_antes = len(df_proc)
 
     # 1. Convertir nombres de columnas a minúsculas
     df_proc = convertir_columnas_minusculas(df_proc, "Edades")
+    df_proc = optimizar_dtypes(df_proc, "Edades")
 
     # 2. Crear la llave 'cedula_numero'
     df_proc = crear_llave_cedula_numero(df_proc, 'cc_nit', 'numero')
@@ -22,7 +25,8 @@ def procesar_edades(df: pd.DataFrame) -> pd.DataFrame:
     # 3. Filtrar por LINEA
     if 'linea' in df_proc.columns:
         lineas_a_mantener = ["[01]CREDITO ARPESOD", "[03]CREDITO RETANQUEO"]
-        df_proc = df_proc[df_proc['linea'].isin(lineas_a_mantener)]
+        # 'linea' llega como category (optimizar_dtypes): isin sobre los códigos
+        df_proc = df_proc.loc[mascara_en(df_proc['linea'], lineas_a_mantener)]
         logger.info(f"Filtrado de Edades por línea de crédito: {registros_antes:,} -> {len(df_proc):,} registros.")
     else:
         logger.warning("No se encontró la columna 'linea' en Edades. No se aplicó el filtro.")
@@ -4,7 +4,14 @@ Basado en el script R original (líneas de carga y procesamiento básico).
 """
 
 import pandas as pd
-from .base import logger, convertir_columnas_minusculas
+from .base import logger, convertir_columnas_minusculas, renombrar_columnas
+
+# Mapeo exacto del R
+RENOMBRES_FNZ001 = {
+    'cc_nit': 'cedula',
+    'dsm_num': 'numero',
+    'vlr_fnz': 'valor'
+}
 
 
 def procesar_fnz001(df: pd.DataFrame) -> pd.DataFrame:
@@ -27,7 +34,9 @@ def procesar_fnz001(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("🔄 TRANSFORMACIÓN FNZ001")
     logger.info("="*70)
     
-    df_proc = df.copy()
+    # Copia superficial: renombrar/asignar columnas no toca el DataFrame del
+    # llamador y no se duplican los datos
+    df_proc = df.copy(deep=False)
     registros_iniciales = len(df_proc)
     
     # PASO 1: Convertir nombres de columnas a minúsculas
@@ -62,21 +71,15 @@ def renombrar_columnas_fnz001(df: pd.DataFrame) -> pd.DataFrame:
     - CC_NIT → cedula
     - DSM_NUM → numero  
     - VLR_FNZ → valor
-    """
-    df_proc = df.copy()
     
-    # Mapeo exacto del R
-    renames = {
-        'cc_nit': 'cedula',
-        'dsm_num': 'numero',
-        'vlr_fnz': 'valor'
-    }
+    Modifica df en sitio (procesar_fnz001 le pasa su propia copia).
+    """
+    df_proc = df
     
     # Aplicar solo las que existan
-    renames_aplicables = {k: v for k, v in renames.items() if k in df_proc.columns}
+    renames_aplicables = renombrar_columnas(df_proc, RENOMBRES_FNZ001)
     
     if renames_aplicables:
-        df_proc.rename(columns=renames_aplicables, inplace=True)
         logger.info(f"   ✅ Columnas renombradas: {renames_aplicables}")
     else:
         logger.warning("   ⚠️  No se encontraron las columnas esperadas para renombrar")
@@ -88,25 +91,26 @@ def renombrar_columnas_fnz001(df: pd.DataFrame) -> pd.DataFrame:
 def convertir_tipos_fnz001(df: pd.DataFrame) -> pd.DataFrame:
     """
     Convierte tipos de datos según R, LIMPIANDO el .0
+    Modifica df en sitio (procesar_fnz001 le pasa su propia copia).
     """
-    from .base import limpiar_columna_identificador
+    from .base import limpiar_identificador_por_unicos, convertir_a_fecha
     
-    df_proc = df.copy()
+    df_proc = df
     
     # Convertir 'numero' - LIMPIAR .0
     if 'numero' in df_proc.columns:
-        df_proc['numero'] = limpiar_columna_identificador(df_proc['numero'])
+        df_proc['numero'] = limpiar_identificador_por_unicos(df_proc['numero'])
         logger.info(f"   ✅ 'numero' limpiado y convertido a string")
     
     # Convertir 'cedula' - LIMPIAR .0
     if 'cedula' in df_proc.columns:
-        df_proc['cedula'] = limpiar_columna_identificador(df_proc['cedula'])
+        df_proc['cedula'] = limpiar_identificador_por_unicos(df_proc['cedula'])
         logger.info(f"   ✅ 'cedula' limpiado y convertido a string")
     
     # Verificar 'corte' (ya debería ser datetime del cargador)
     if 'corte' in df_proc.columns:
         if not pd.api.types.is_datetime64_any_dtype(df_proc['corte']):
-            df_proc['corte'] = pd.to_datetime(df_proc['corte'], errors='coerce')
+            df_proc['corte'] = convertir_a_fecha(df_proc['corte'])
             logger.info(f"   ✅ 'corte' convertido a datetime")
         else:
             logger.info(f"   ✅ 'corte' ya es datetime")
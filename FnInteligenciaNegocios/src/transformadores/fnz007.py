@@ -1,11 +1,22 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
-from .base import logger, convertir_columnas_minusculas, eliminar_columnas
+from .base import logger, convertir_columnas_minusculas, eliminar_columnas, optimizar_dtypes, renombrar_columnas, STRING_DTYPE, HAS_PYARROW, unir_columnas_texto
+
+# Generador por defecto (PCG64) para los reemplazos aleatorios de outliers
+_RNG = np.random.default_rng()
 
-def procesar_fnz007(df: pd.DataFrame) -> pd.DataFrame:
+
+def procesar_fnz007(df: pd.DataFrame, semilla: int = None) -> pd.DataFrame:
     """
     Realiza la limpieza y transformación completa del dataframe FNZ007.
     
+    Args:
+        df: DataFrame FNZ007 crudo
+        semilla: Semilla para que los reemplazos de outliers sean reproducibles
+    
     Pasos:
     1. Dividir columna DESEMBOLSO y filtrar
     2. Limpiar outliers (fecha nacimiento, gastos, ingresos, avalúo)
@@ -19,17 +30,20 @@ def procesar_fnz007(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("🔄 TRANSFORMACIÓN FNZ007 (OPTIMIZADA)")
     logger.info("="*70)
     
-    df_proc = df.copy()
-    registros_iniciales = len(df_proc)
+    registros_iniciales = len(df)
     
     # PASO 1: Dividir DESEMBOLSO y filtrar
-    df_proc = dividir_y_filtrar_desembolso(df_proc)
+    # Única copia del pipeline: devuelve un DataFrame nuevo con solo las filas DF.
+    # Los pasos siguientes modifican ese DataFrame en sitio.
+    df_proc = dividir_y_filtrar_desembolso(df)
     
     # PASO 2: Limpiar outliers ANTES de otras transformaciones
-    df_proc = limpiar_outliers_fnz007(df_proc)
+    df_proc = limpiar_outliers_fnz007(df_proc, semilla)
     
     # PASO 3: Convertir a minúsculas
     df_proc = convertir_columnas_minusculas(df_proc, "FNZ007")
+    # Solo enteros: los pasos 4-5 reescriben las columnas de texto
+    df_proc = optimizar_dtypes(df_proc, "FNZ007", umbral_categoria=0)
     
     # PASO 4: Unificar columnas de empleo (VECTORIZADO)
     df_proc = unificar_columnas_empleo(df_proc)
@@ -64,31 +78,36 @@ def dividir_y_filtrar_desembolso(df: pd.DataFrame) -> pd.DataFrame:
     Código R:
     BaseFNZ <- separate(BaseFNZ, DESEMBOLSO, into = c("DF", "NUMERO"), sep = "-")
     BaseFNZ <- BaseFNZ %>% filter(DF == "DF")
+    
+    Siempre devuelve un DataFrame nuevo (nunca el de entrada), de modo que los
+    pasos siguientes de procesar_fnz007 pueden modificarlo en sitio.
     """
     logger.info("\n📋 PASO 1: División y filtro de DESEMBOLSO")
     
     if 'DESEMBOLSO' not in df.columns:
         logger.warning("⚠️  Columna 'DESEMBOLSO' no encontrada. Saltando este paso.")
-        return df
+        return df.copy(deep=False)
     
     registros_antes = len(df)
-    df_proc = df.copy()
     
     # Dividir columna DESEMBOLSO
     try:
         # Convertir a string y dividir por '-'
-        df_proc['DESEMBOLSO'] = df_proc['DESEMBOLSO'].astype(str)
+        desembolso = df['DESEMBOLSO'].astype(str)
+        split_data = desembolso.str.split('-', n=1, expand=True)
+        col_df = split_data[0] if 0 in split_data.columns else pd.Series(None, index=df.index, dtype=object)
+        
+        # Filtrar solo donde DF == "DF": se copian únicamente las filas que quedan
+        mascara = (col_df == 'DF').to_numpy()
+        df_proc = df.loc[mascara].copy()
         
         # Dividir en dos columnas
-        split_data = df_proc['DESEMBOLSO'].str.split('-', n=1, expand=True)
-        df_proc['DF'] = split_data[0] if 0 in split_data.columns else None
-        df_proc['NUMERO'] = split_data[1] if 1 in split_data.columns else None
+        df_proc['DESEMBOLSO'] = desembolso[mascara]
+        df_proc['DF'] = col_df[mascara]
+        df_proc['NUMERO'] = split_data[1][mascara] if 1 in split_data.columns else None
         
         logger.info(f"✅ Columna DESEMBOLSO dividida en 'DF' y 'NUMERO'")
         
-        # Filtrar solo donde DF == "DF"
-        df_proc = df_proc[df_proc['DF'] == 'DF'].copy()
-        
         registros_despues = len(df_proc)
         eliminados = registros_antes - registros_despues
         
@@ -97,202 +116,273 @@ def dividir_y_filtrar_desembolso(df: pd.DataFrame) -> pd.DataFrame:
         
     except Exception as e:
         logger.error(f"❌ Error dividiendo DESEMBOLSO: {e}")
+        df_proc = df.copy(deep=False)
     
     return df_proc
 
 
-def limpiar_outliers_fnz007(df: pd.DataFrame) -> pd.DataFrame:
+# Rangos válidos del negocio para las variables numéricas con outliers
+RANGOS_OUTLIERS = {
+    'GASTOS': (100000, 1000000),
+    'INGRESOS': (1300000, 3000000),
+    'VVDAAVAL': (50000000, 300000000),
+}
+COLUMNA_FECHA_NACIMIENTO = 'FS1NACFEC'
+FECHA_NACIMIENTO_MIN = pd.Timestamp('1944-01-01')
+FECHA_NACIMIENTO_MAX = pd.Timestamp('2005-12-31')
+
+
+def limpiar_outliers_fnz007(df: pd.DataFrame, semilla: int = None) -> pd.DataFrame:
     """
     Limpia outliers en variables numéricas críticas usando el método IQR.
     Genera valores aleatorios dentro de rangos válidos para reemplazar outliers.
+    Modifica df en sitio.
+
+    Cada columna es independiente: se corrigen en paralelo (hilos; cuantiles
+    y máscaras corren en C sin el GIL) y se asignan al DataFrame al final,
+    desde el hilo principal. Cada hilo usa su propio generador (un
+    Generator no se comparte entre hilos), derivado de la semilla.
     """
     logger.info("\n🔧 PASO 2: Limpieza de OUTLIERS")
     
-    df_proc = df.copy()
-    
-    # 1. Fecha de Nacimiento
-    df_proc = corregir_outliers_fecha_nacimiento(df_proc)
-    
-    # 2. Gastos
-    df_proc = corregir_outliers_gastos(df_proc)
-    
-    # 3. Ingresos
-    df_proc = corregir_outliers_ingresos(df_proc)
+    generadores = iter([
+        np.random.default_rng(s)
+        for s in np.random.SeedSequence(semilla).spawn(1 + len(RANGOS_OUTLIERS))
+    ])
+    
+    tareas = {}
+    with ThreadPoolExecutor(max_workers=1 + len(RANGOS_OUTLIERS)) as ejecutor:
+        # 1. Fecha de Nacimiento
+        if COLUMNA_FECHA_NACIMIENTO in df.columns:
+            tareas[COLUMNA_FECHA_NACIMIENTO] = ejecutor.submit(
+                _corregir_serie_fecha_nacimiento, df[COLUMNA_FECHA_NACIMIENTO], next(generadores)
+            )
+        else:
+            logger.warning(f"⚠️  Columna '{COLUMNA_FECHA_NACIMIENTO}' no encontrada")
+        
+        # 2-4. Gastos, Ingresos y Avalúo de Vivienda
+        for columna, (min_val, max_val) in RANGOS_OUTLIERS.items():
+            if columna in df.columns:
+                tareas[columna] = ejecutor.submit(
+                    _corregir_serie_numerica, df[columna], min_val, max_val, next(generadores)
+                )
+            else:
+                logger.warning(f"⚠️  Columna '{columna}' no encontrada")
     
-    # 4. Avalúo de Vivienda
-    df_proc = corregir_outliers_avaluo(df_proc)
+    for columna, tarea in tareas.items():
+        df[columna] = tarea.result()
     
-    return df_proc
+    return df
 
 
 def corregir_outliers_fecha_nacimiento(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Corrige outliers en fecha de nacimiento.
+    Corrige outliers en fecha de nacimiento (modifica df en sitio).
     Rango válido: 1944-01-01 a 2005-12-31
     """
-    columna = 'FS1NACFEC'
+    columna = COLUMNA_FECHA_NACIMIENTO
     
     if columna not in df.columns:
         logger.warning(f"⚠️  Columna '{columna}' no encontrada")
         return df
     
-    df_proc = df.copy()
+    df[columna] = _corregir_serie_fecha_nacimiento(df[columna])
+    return df
+
+
+def _corregir_serie_fecha_nacimiento(serie: pd.Series,
+                                     rng: np.random.Generator = _RNG) -> pd.Series:
+    """Devuelve una serie nueva con las fechas de nacimiento corregidas."""
+    columna = serie.name
     
-    # Convertir a datetime
-    df_proc[columna] = pd.to_datetime(df_proc[columna], errors='coerce')
+    # Convertir a datetime y trabajar sobre los enteros del arreglo
+    serie = pd.to_datetime(serie, errors='coerce')
+    fechas = serie.to_numpy()
+    unidad = np.datetime_data(fechas.dtype)[0]
+    enteros = fechas.view(np.int64)
+    mask_nulos = np.isnat(fechas)
     
     # Definir rangos
-    fecha_min = pd.Timestamp('1944-01-01')
-    fecha_max = pd.Timestamp('2005-12-31')
+    fecha_min = FECHA_NACIMIENTO_MIN
+    fecha_max = FECHA_NACIMIENTO_MAX
     
-    # Calcular IQR
-    Q1 = df_proc[columna].quantile(0.25)
-    Q3 = df_proc[columna].quantile(0.75)
-    IQR = Q3 - Q1
-    
-    limite_inferior = Q1 - 1.5 * IQR
-    limite_superior = Q3 + 1.5 * IQR
-    
-    # Ajustar límites al rango válido
-    limite_inferior = max(limite_inferior, fecha_min)
-    limite_superior = min(limite_superior, fecha_max)
+    if mask_nulos.all():
+        limite_inferior, limite_superior = fecha_min, fecha_max
+    else:
+        # Calcular IQR (ambos cuantiles en una sola pasada)
+        Q1, Q3 = np.quantile(enteros[~mask_nulos], [0.25, 0.75])
+        IQR = Q3 - Q1
+        
+        limite_inferior = pd.Timestamp(int(Q1 - 1.5 * IQR), unit=unidad)
+        limite_superior = pd.Timestamp(int(Q3 + 1.5 * IQR), unit=unidad)
+        
+        # Ajustar límites al rango válido
+        limite_inferior = max(limite_inferior, fecha_min)
+        limite_superior = min(limite_superior, fecha_max)
     
-    # Identificar outliers y nulos
-    mask_outliers = (df_proc[columna] < limite_inferior) | (df_proc[columna] > limite_superior)
-    mask_nulos = df_proc[columna].isnull()
-    mask_corregir = mask_outliers | mask_nulos
+    # Identificar outliers y nulos en una sola comparación: NaT es el entero
+    # mínimo de int64, así que siempre queda por debajo del límite inferior
+    lim_inf = np.datetime64(limite_inferior.to_datetime64(), unidad).astype(np.int64)
+    lim_sup = np.datetime64(limite_superior.to_datetime64(), unidad).astype(np.int64)
+    mask_corregir = (enteros < lim_inf) | (enteros > lim_sup)
     
-    num_outliers = mask_outliers.sum()
-    num_nulos = mask_nulos.sum()
     total_corregir = mask_corregir.sum()
+    num_nulos = mask_nulos.sum()
+    num_outliers = total_corregir - num_nulos
     
     if total_corregir > 0:
         # Generar fechas usando días desde epoch
-        dias_min = (limite_inferior - pd.Timestamp('1970-01-01')).days
-        dias_max = (limite_superior - pd.Timestamp('1970-01-01')).days
+        dias_min = np.datetime64(limite_inferior.to_datetime64(), 'D').astype(np.int64)
+        dias_max = np.datetime64(limite_superior.to_datetime64(), 'D').astype(np.int64)
         
         # Generar días aleatorios
-        dias_aleatorios = np.random.randint(
+        dias_aleatorios = rng.integers(
             dias_min, 
             dias_max, 
             size=total_corregir,
             dtype=np.int64
         )
         
-        # Convertir días a fechas
-        fechas_aleatorias = pd.to_datetime(dias_aleatorios, unit='D', origin='unix')
+        # Convertir días a fechas: vista datetime64[D] y cast a la unidad de la columna
+        fechas_aleatorias = dias_aleatorios.view('datetime64[D]').astype(fechas.dtype)
         
-        df_proc.loc[mask_corregir, columna] = fechas_aleatorias
+        # Arreglo propio: no se escribe sobre el bloque compartido con df
+        valores = fechas.copy()
+        valores[mask_corregir] = fechas_aleatorias
+        serie = pd.Series(valores, index=serie.index, name=columna)
         
         logger.info(f"  ✅ {columna}: {total_corregir:,} valores corregidos")
         logger.info(f"     Outliers: {num_outliers:,}, Nulos: {num_nulos:,}")
     else:
         logger.info(f"  ✅ {columna}: Sin outliers")
     
-    return df_proc
+    return serie
 
 
 def corregir_outliers_numericos(df: pd.DataFrame, columna: str, 
                                 min_val: float, max_val: float) -> pd.DataFrame:
     """
-    Función genérica para corregir outliers en columnas numéricas.
+    Función genérica para corregir outliers en columnas numéricas (modifica df en sitio).
     """
     if columna not in df.columns:
         logger.warning(f"⚠️  Columna '{columna}' no encontrada")
         return df
     
-    df_proc = df.copy()
-    
-    # Convertir a numérico
-    df_proc[columna] = pd.to_numeric(df_proc[columna], errors='coerce')
-    
-    # Calcular IQR
-    Q1 = df_proc[columna].quantile(0.25)
-    Q3 = df_proc[columna].quantile(0.75)
-    IQR = Q3 - Q1
+    df[columna] = _corregir_serie_numerica(df[columna], min_val, max_val)
+    return df
+
+
+def _corregir_serie_numerica(serie: pd.Series, min_val: float, max_val: float,
+                             rng: np.random.Generator = _RNG) -> pd.Series:
+    """Devuelve una serie nueva con los outliers y nulos reemplazados."""
+    columna = serie.name
     
-    limite_inferior = Q1 - 1.5 * IQR
-    limite_superior = Q3 + 1.5 * IQR
+    # Convertir a numérico y trabajar sobre un arreglo float propio
+    # (no se escribe sobre el bloque compartido con df)
+    serie = pd.to_numeric(serie, errors='coerce')
+    valores = serie.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    mask_nulos = np.isnan(valores)
     
-    # Ajustar a rangos válidos del negocio
-    limite_inferior = max(limite_inferior, min_val)
-    limite_superior = min(limite_superior, max_val)
+    if mask_nulos.all():
+        limite_inferior, limite_superior = min_val, max_val
+    else:
+        # Calcular IQR (ambos cuantiles en una sola pasada)
+        Q1, Q3 = np.quantile(valores[~mask_nulos], [0.25, 0.75])
+        IQR = Q3 - Q1
+        
+        limite_inferior = Q1 - 1.5 * IQR
+        limite_superior = Q3 + 1.5 * IQR
+        
+        # Ajustar a rangos válidos del negocio
+        limite_inferior = max(limite_inferior, min_val)
+        limite_superior = min(limite_superior, max_val)
     
-    # Identificar outliers y nulos
-    mask_outliers = (df_proc[columna] < limite_inferior) | (df_proc[columna] > limite_superior)
-    mask_nulos = df_proc[columna].isnull()
-    mask_corregir = mask_outliers | mask_nulos
+    # Outliers y nulos en una sola máscara: NaN falla ambas comparaciones
+    mask_corregir = ~((valores >= limite_inferior) & (valores <= limite_superior))
     
     total_corregir = mask_corregir.sum()
     
     if total_corregir > 0:
         # Generar valores aleatorios dentro del rango
-        valores_aleatorios = np.random.uniform(
+        valores_aleatorios = rng.uniform(
             limite_inferior,
             limite_superior,
             size=total_corregir
         )
         
-        df_proc.loc[mask_corregir, columna] = valores_aleatorios
+        # Los reemplazos no son enteros: la columna queda en float
+        valores[mask_corregir] = valores_aleatorios
+        serie = pd.Series(valores, index=serie.index, name=columna)
         
         logger.info(f"  ✅ {columna}: {total_corregir:,} valores corregidos")
         logger.info(f"     Rango: ${limite_inferior:,.0f} - ${limite_superior:,.0f}")
     else:
         logger.info(f"  ✅ {columna}: Sin outliers")
     
-    return df_proc
+    return serie
 
 
 def corregir_outliers_gastos(df: pd.DataFrame) -> pd.DataFrame:
     """Corrige outliers en GASTOS. Rango: 100,000 - 1,000,000"""
-    return corregir_outliers_numericos(df, 'GASTOS', 100000, 1000000)
+    return corregir_outliers_numericos(df, 'GASTOS', *RANGOS_OUTLIERS['GASTOS'])
 
 
 def corregir_outliers_ingresos(df: pd.DataFrame) -> pd.DataFrame:
     """Corrige outliers en INGRESOS. Rango: 1,300,000 - 3,000,000"""
-    return corregir_outliers_numericos(df, 'INGRESOS', 1300000, 3000000)
+    return corregir_outliers_numericos(df, 'INGRESOS', *RANGOS_OUTLIERS['INGRESOS'])
 
 
 def corregir_outliers_avaluo(df: pd.DataFrame) -> pd.DataFrame:
     """Corrige outliers en VVDAAVAL. Rango: 50,000,000 - 300,000,000"""
-    return corregir_outliers_numericos(df, 'VVDAAVAL', 50000000, 300000000)
+    return corregir_outliers_numericos(df, 'VVDAAVAL', *RANGOS_OUTLIERS['VVDAAVAL'])
 
 
 # ============================================================
 # UNIFICACIÓN DE COLUMNAS - VERSIÓN VECTORIZADA (100x más rápida)
 # ============================================================
 
+# Columna unificada → (columna principal, columna independiente)
+COLUMNAS_EMPLEO = {
+    'act_lab': ('ocupacion', 'indpactivi'),
+    'empresa': ('lbempresa', 'indprzsoci'),
+    'cargos': ('cargo', 'indpnombre'),
+}
+
 def unificar_columnas_empleo(df: pd.DataFrame) -> pd.DataFrame:
     """
     Unifica columnas de empleo usando OPERACIONES VECTORIZADAS.
     
     OPTIMIZACIÓN: Sin apply(), 100% vectorizado con numpy/pandas.
     Mejora de rendimiento: ~100x más rápido que la versión con apply().
+    Modifica df en sitio.
     """
     logger.info("\n📋 PASO 4: Unificación de columnas de empleo (VECTORIZADA)")
 
-    df_proc = df.copy()
-
-    # ACT_LAB (OCUPACION + INDPACTIVI)
-    if 'ocupacion' in df_proc.columns and 'indpactivi' in df_proc.columns:
-        df_proc['act_lab'] = unificar_dos_columnas_vectorizado(
-            df_proc, 'ocupacion', 'indpactivi'
-        )
-        logger.info("  ✅ Creada 'act_lab' (vectorizada)")
+    df_proc = df
+    pares = {
+        nueva: (col1, col2)
+        for nueva, (col1, col2) in COLUMNAS_EMPLEO.items()
+        if col1 in df_proc.columns and col2 in df_proc.columns
+    }
 
-    # EMPRESA (LBEMPRESA + INDPRZSOCI)
-    if 'lbempresa' in df_proc.columns and 'indprzsoci' in df_proc.columns:
-        df_proc['empresa'] = unificar_dos_columnas_vectorizado(
-            df_proc, 'lbempresa', 'indprzsoci'
-        )
-        logger.info("  ✅ Creada 'empresa' (vectorizada)")
+    # Las tres uniones son independientes. Con pyarrow los kernels de texto
+    # sueltan el GIL y corren en paralelo; sin él (object) se hacen en serie
+    if HAS_PYARROW and len(pares) > 1:
+        with ThreadPoolExecutor(max_workers=len(pares)) as ejecutor:
+            tareas = {
+                nueva: ejecutor.submit(unificar_dos_columnas_vectorizado, df_proc, col1, col2)
+                for nueva, (col1, col2) in pares.items()
+            }
+            resultados = {nueva: tarea.result() for nueva, tarea in tareas.items()}
+    else:
+        resultados = {
+            nueva: unificar_dos_columnas_vectorizado(df_proc, col1, col2)
+            for nueva, (col1, col2) in pares.items()
+        }
 
-    # CARGOS (CARGO + INDPNOMBRE)
-    if 'cargo' in df_proc.columns and 'indpnombre' in df_proc.columns:
-        df_proc['cargos'] = unificar_dos_columnas_vectorizado(
-            df_proc, 'cargo', 'indpnombre'
-        )
-        logger.info("  ✅ Creada 'cargos' (vectorizada)")
+    for nueva, serie in resultados.items():
+        df_proc[nueva] = serie
+        logger.info(f"  ✅ Creada '{nueva}' (vectorizada)")
 
     return df_proc
 
@@ -308,56 +398,53 @@ def unificar_dos_columnas_vectorizado(df: pd.DataFrame, col1_name: str, col2_nam
     - Si ambas llenas: "col1 col2"
     
     Estrategia de optimización:
-    1. Convertir a string y limpiar espacios (vectorizado)
-    2. Identificar vacías con máscaras booleanas
-    3. Usar np.select() para aplicar condiciones (100x más rápido que apply)
+    1. Pasar a texto de pandas (Arrow si está disponible) y limpiar espacios
+    2. Unir elemento a elemento en una sola pasada: "col1 col2"
+    3. strip() quita el separador sobrante cuando una de las dos está vacía
     """
     # PASO 1: Preparar datos (vectorizado)
-    col1 = df[col1_name].fillna('').astype(str).str.strip()
-    col2 = df[col2_name].fillna('').astype(str).str.strip()
-    
-    # Eliminar 'nan' literal (cuando viene de conversión)
-    col1 = col1.replace('nan', '')
-    col2 = col2.replace('nan', '')
-    
-    # PASO 2: Crear máscaras booleanas
-    col1_vacia = (col1 == '')
-    col2_vacia = (col2 == '')
-    
-    ambas_vacias = col1_vacia & col2_vacia
-    solo_col1_vacia = col1_vacia & ~col2_vacia
-    solo_col2_vacia = ~col1_vacia & col2_vacia
-    ambas_llenas = ~col1_vacia & ~col2_vacia
-    
-    # PASO 3: Aplicar lógica con np.select (vectorizado)
-    condiciones = [
-        ambas_vacias,
-        solo_col1_vacia,
-        solo_col2_vacia,
-        ambas_llenas
-    ]
+    col1 = _texto_sin_nulos(df[col1_name])
+    col2 = _texto_sin_nulos(df[col2_name])
     
-    valores = [
-        '',                    # Si ambas vacías → ''
-        col2,                  # Si solo col1 vacía → col2
-        col1,                  # Si solo col2 vacía → col1
-        col1 + ' ' + col2      # Si ambas llenas → 'col1 col2'
-    ]
-    
-    resultado = np.select(condiciones, valores, default='')
+    # PASO 2-3: Unir y recortar (ambas vacías → ' ' → '')
+    return unir_columnas_texto(col1, col2, ' ').str.strip()
+
+
+def _texto_sin_nulos(serie: pd.Series) -> pd.Series:
+    """Texto sin espacios en los extremos; nulos y 'nan' literal quedan como ''."""
+    texto = serie.astype(STRING_DTYPE).str.strip()
+    return texto.mask(texto == 'nan', '').fillna('')
+
+
+def _remapear(serie: pd.Series, reemplazos: dict) -> pd.Series:
+    """
+    Equivale a serie.replace(reemplazos) para valores exactos.
     
-    return pd.Series(resultado, index=df.index)
+    - Categórica: se remapean solo las categorías y los códigos se traducen
+      con un take entero (varias categorías pueden caer en la misma)
+    - Otro dtype: map con dict y lo que no está en el dict se conserva con fillna
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        destino = [reemplazos.get(c, c) for c in serie.cat.categories]
+        codigos_destino, categorias_destino = pd.factorize(pd.Index(destino))
+        codigos = serie.cat.codes.to_numpy()
+        nuevos = np.where(codigos >= 0, codigos_destino[codigos], -1)
+        return pd.Series(
+            pd.Categorical.from_codes(nuevos, categories=categorias_destino),
+            index=serie.index, name=serie.name
+        )
+    return serie.map(reemplazos).fillna(serie)
 
 
 def categorizar_estado_civil(df: pd.DataFrame) -> pd.DataFrame:
-    """Categoriza estado civil agrupando variantes."""
+    """Categoriza estado civil agrupando variantes (modifica df en sitio)."""
     logger.info("\n📋 PASO 5a: Categorización de estado civil")
     
     if 'fs1estcvil' not in df.columns:
         logger.warning("  ⚠️  Columna 'fs1estcvil' no encontrada")
         return df
     
-    df_proc = df.copy()
+    df_proc = df
     
     replacements = {
         'Divorciado': 'Soltero',
@@ -366,25 +453,27 @@ def categorizar_estado_civil(df: pd.DataFrame) -> pd.DataFrame:
         '.': 'Soltero'
     }
     
-    registros_antes = df_proc['fs1estcvil'].value_counts()
-    df_proc['fs1estcvil'] = df_proc['fs1estcvil'].replace(replacements)
-    registros_despues = df_proc['fs1estcvil'].value_counts()
+    # Pocos valores distintos: como category el remapeo toca solo las categorías
+    df_proc['fs1estcvil'] = _remapear(df_proc['fs1estcvil'].astype('category'), replacements)
     
     logger.info("  ✅ Estado civil categorizado")
-    logger.info(f"     Categorías finales: {list(registros_despues.index)}")
+    # value_counts recorre toda la columna: solo se calcula en DEBUG
+    if logger.isEnabledFor(logging.DEBUG):
+        registros_despues = df_proc['fs1estcvil'].value_counts()
+        logger.debug(f"     Categorías finales: {list(registros_despues.index)}")
     
     return df_proc
 
 
 def categorizar_nivel_escolar(df: pd.DataFrame) -> pd.DataFrame:
-    """Categoriza nivel escolar agrupando similares."""
+    """Categoriza nivel escolar agrupando similares (modifica df en sitio)."""
     logger.info("\n📋 PASO 5b: Categorización de nivel escolar")
     
     if 'nvescolar' not in df.columns:
         logger.warning("  ⚠️  Columna 'nvescolar' no encontrada")
         return df
     
-    df_proc = df.copy()
+    df_proc = df
     
     replacements = {
         'Especialización': 'Educacion superior',
@@ -400,11 +489,13 @@ def categorizar_nivel_escolar(df: pd.DataFrame) -> pd.DataFrame:
         'Tecn¾logo': 'Tecnico o Tecnologo'
     }
     
-    df_proc['nvescolar'] = df_proc['nvescolar'].replace(replacements)
+    df_proc['nvescolar'] = _remapear(df_proc['nvescolar'].astype('category'), replacements)
     
-    categorias_finales = df_proc['nvescolar'].value_counts()
     logger.info("  ✅ Nivel escolar categorizado")
-    logger.info(f"     Categorías finales: {len(categorias_finales)}")
+    # value_counts recorre toda la columna: solo se calcula en DEBUG
+    if logger.isEnabledFor(logging.DEBUG):
+        categorias_finales = df_proc['nvescolar'].value_counts()
+        logger.debug(f"     Categorías finales: {len(categorias_finales)}")
     
     return df_proc
 
@@ -434,21 +525,21 @@ def eliminar_columnas_fnz007(df: pd.DataFrame) -> pd.DataFrame:
     return df_proc
 
 
+RENOMBRES_FNZ007 = {
+    'ciudad': 'nomciudad',
+    'codciudad': 'ciudad'
+}
+
+
 def renombrar_columnas_fnz007(df: pd.DataFrame) -> pd.DataFrame:
-    """Renombra columnas según lógica de R."""
+    """Renombra columnas según lógica de R (modifica df en sitio)."""
     logger.info("\n📋 PASO 7: Renombrado de columnas")
     
-    df_proc = df.copy()
-    
-    renames = {
-        'ciudad': 'nomciudad',
-        'codciudad': 'ciudad'
-    }
+    df_proc = df
     
-    columnas_renombradas = {k: v for k, v in renames.items() if k in df_proc.columns}
+    columnas_renombradas = renombrar_columnas(df_proc, RENOMBRES_FNZ007)
     
     if columnas_renombradas:
-        df_proc.rename(columns=columnas_renombradas, inplace=True)
         logger.info(f"  ✅ Columnas renombradas: {columnas_renombradas}")
     else:
         logger.info("  ℹ️  No se encontraron columnas para renombrar")
@@ -3,8 +3,12 @@ Transformador para R05.
 CORRECCIÓN CRÍTICA: cedula_numero usa "_" (guion bajo), no "-" (guion)
 """
 
+import numpy as np
 import pandas as pd
-from .base import logger, convertir_columnas_minusculas
+from .base import (
+    logger, convertir_columnas_minusculas, renombrar_columnas, unir_columnas_texto,
+    sumar_por_llave_y_corte, convertir_a_fecha, columnas_presentes, STRING_DTYPE
+)
 
 def procesar_r05(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -24,7 +28,9 @@ def procesar_r05(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("="*70)
     logger.info("")
     
-    df_proc = df.copy()
+    # Copia superficial: los pasos renombran y asignan columnas sin tocar
+    # el DataFrame del llamador ni duplicar los datos
+    df_proc = df.copy(deep=False)
     registros_antes = len(df_proc)
 
     # PASO 1: Convertir nombres de columnas a minúsculas
@@ -62,14 +68,14 @@ def procesar_r05(df: pd.DataFrame) -> pd.DataFrame:
     df_proc = crear_llave_cedula_numero_r05(df_proc)
     logger.info("")
 
-    # PASO 6: Filtrar por abono > 0
+    # PASO 6: Filtrar por abono > 0 (solo la máscara; se aplica al agrupar)
     logger.info("📋 PASO 6: Filtrar abono > 0")
-    df_proc = filtrar_abono_positivo(df_proc)
+    mascara_abono = mascara_abono_positivo(df_proc)
     logger.info("")
 
     # PASO 7: Agrupar duplicados y renombrar a ABONO1
     logger.info("📋 PASO 7: Agrupar duplicados")
-    df_proc = agrupar_duplicados_r05(df_proc)
+    df_proc = agrupar_duplicados_r05(df_proc, mascara_abono)
     logger.info("")
 
     # Resumen final
@@ -89,31 +95,33 @@ def identificar_y_renombrar_r05(df: pd.DataFrame) -> pd.DataFrame:
     """
     Identifica y renombra columnas específicas de R05.
     """
+    # Una sola pasada por las columnas: primera coincidencia de cada fragmento
+    # (las columnas ya están en minúsculas)
+    primeras = {}
+    for col in df.columns:
+        for fragmento in ('nit', 'numcru2', 'abono'):
+            if fragmento not in primeras and fragmento in col:
+                primeras[fragmento] = col
+    columnas = set(df.columns)
+    
     renames = {}
     
     # Buscar columna NIT/cedula
-    if 'nit' in df.columns:
-        renames['nit'] = 'cedula'
-    elif any('nit' in col for col in df.columns):
-        col_nit = [col for col in df.columns if 'nit' in col][0]
+    col_nit = 'nit' if 'nit' in columnas else primeras.get('nit')
+    if col_nit:
         renames[col_nit] = 'cedula'
     
     # Buscar mcnnumcru2 (número de obligación)
-    if 'mcnnumcru2' in df.columns:
-        renames['mcnnumcru2'] = 'numero'
-    elif any('numcru2' in col for col in df.columns):
-        col_numero = [col for col in df.columns if 'numcru2' in col][0]
+    col_numero = 'mcnnumcru2' if 'mcnnumcru2' in columnas else primeras.get('numcru2')
+    if col_numero:
         renames[col_numero] = 'numero'
     
-    # Buscar columna abono
-    if 'abono' in df.columns:
-        pass  # Ya está bien nombrada
-    elif any('abono' in col.lower() for col in df.columns):
-        col_abono = [col for col in df.columns if 'abono' in col.lower()][0]
-        renames[col_abono] = 'abono'
+    # Buscar columna abono ('abono' exacta ya está bien nombrada)
+    if 'abono' not in columnas and 'abono' in primeras:
+        renames[primeras['abono']] = 'abono'
 
     if renames:
-        df.rename(columns=renames, inplace=True)
+        renombrar_columnas(df, renames)
         logger.info(f"   ✅ Columnas renombradas: {renames}")
     else:
         logger.warning("   ⚠️  No se encontraron columnas para renombrar")
@@ -127,33 +135,32 @@ def convertir_tipos_r05(df: pd.DataFrame) -> pd.DataFrame:
     """
     Convierte tipos de datos en R05, LIMPIANDO el .0
     """
-    from .base import limpiar_columna_identificador
+    from .base import limpiar_identificador_por_unicos
     
-    # Convertir 'corte' a datetime
+    # Convertir 'corte' a datetime y 'abono' a numérico
     if 'corte' in df.columns:
-        df['corte'] = pd.to_datetime(df['corte'], errors='coerce')
-        nulos_corte = df['corte'].isnull().sum()
-        if nulos_corte > 0:
-            logger.warning(f"   ⚠️  {nulos_corte:,} registros con 'corte' nulo")
-        else:
-            logger.info(f"   ✅ 'corte' convertido a datetime")
-    
-    # Convertir 'abono' a numérico
+        df['corte'] = convertir_a_fecha(df['corte'])
     if 'abono' in df.columns:
         df['abono'] = pd.to_numeric(df['abono'], errors='coerce')
-        nulos_abono = df['abono'].isnull().sum()
-        if nulos_abono > 0:
-            logger.warning(f"   ⚠️  {nulos_abono:,} registros con 'abono' nulo")
+    
+    # Nulos de ambas columnas en un solo barrido
+    columnas_convertidas = columnas_presentes(df, ('corte', 'abono'))
+    nulos = df[columnas_convertidas].isna().sum()
+    descripcion = {'corte': 'datetime', 'abono': 'numérico'}
+    for col in columnas_convertidas:
+        if nulos[col] > 0:
+            logger.warning(f"   ⚠️  {nulos[col]:,} registros con '{col}' nulo")
         else:
-            logger.info(f"   ✅ 'abono' convertido a numérico")
+            logger.info(f"   ✅ '{col}' convertido a {descripcion[col]}")
     
-    # Convertir 'cedula' y 'numero' a string LIMPIO
+    # Convertir 'cedula' y 'numero' a string LIMPIO. Se repiten mucho: se limpia
+    # cada valor distinto una vez y quedan como category (códigos enteros)
     if 'cedula' in df.columns:
-        df['cedula'] = limpiar_columna_identificador(df['cedula'])
+        df['cedula'] = limpiar_identificador_por_unicos(df['cedula'])
         logger.info(f"   ✅ 'cedula' limpiado y convertido a string")
     
     if 'numero' in df.columns:
-        df['numero'] = limpiar_columna_identificador(df['numero'])
+        df['numero'] = limpiar_identificador_por_unicos(df['numero'])
         logger.info(f"   ✅ 'numero' limpiado y convertido a string")
     
     return df
@@ -171,7 +178,7 @@ def crear_llave_cedula_numero_r05(df: pd.DataFrame) -> pd.DataFrame:
         logger.error(f"   Columnas disponibles: {list(df.columns)}")
         return df
     
-    df['cedula_numero'] = df['cedula'] + '-' + df['numero']
+    df['cedula_numero'] = _llave_desde_categorias(df['cedula'], df['numero'], '-')
     
     llaves_validas = df['cedula_numero'].notna().sum()
     llaves_vacias = (df['cedula_numero'] == '-').sum()
@@ -185,52 +192,93 @@ def crear_llave_cedula_numero_r05(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def filtrar_abono_positivo(df: pd.DataFrame) -> pd.DataFrame:
+def _llave_desde_categorias(cedula: pd.Series, numero: pd.Series, separador: str) -> pd.Series:
     """
-    Filtra registros con abono > 0.
+    Arma cedula + separador + numero como categórica.
+    Combina los códigos de ambas columnas en un entero, y solo construye el
+    texto de cada combinación distinta (no una cadena por fila).
+    """
+    if not (isinstance(cedula.dtype, pd.CategoricalDtype) and isinstance(numero.dtype, pd.CategoricalDtype)):
+        return _unir_fila_a_fila(cedula, numero, separador)
+    
+    n_numeros = len(numero.cat.categories)
+    combinados = cedula.cat.codes.to_numpy(dtype='int64') * n_numeros + numero.cat.codes.to_numpy(dtype='int64')
+    codigos, unicos = pd.factorize(combinados)
+    
+    textos = pd.Index(unir_columnas_texto(
+        pd.Series(cedula.cat.categories.astype(STRING_DTYPE)[unicos // n_numeros]),
+        pd.Series(numero.cat.categories.astype(STRING_DTYPE)[unicos % n_numeros]),
+        separador
+    ))
+    if textos.has_duplicates:
+        # Colisión de texto (el separador aparece dentro de un valor): concatenar fila a fila
+        return _unir_fila_a_fila(cedula, numero, separador)
+    
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=textos), index=cedula.index)
+
+
+def _unir_fila_a_fila(cedula: pd.Series, numero: pd.Series, separador: str) -> pd.Series:
+    """cedula + separador + numero sobre el texto completo de cada fila."""
+    return unir_columnas_texto(cedula.astype(STRING_DTYPE), numero.astype(STRING_DTYPE), separador)
+
+
+def mascara_abono_positivo(df: pd.DataFrame):
+    """
+    Máscara booleana de registros con abono > 0 (None si no existe 'abono').
+    No materializa el DataFrame filtrado: agrupar_duplicados_r05 la aplica
+    directamente sobre las columnas que agrega.
     """
     if 'abono' not in df.columns:
         logger.warning("   ⚠️  No existe columna 'abono'")
-        return df
+        return None
     
+    mascara = (df['abono'] > 0).to_numpy()
     registros_antes = len(df)
-    df = df[df['abono'] > 0].copy()
-    eliminados = registros_antes - len(df)
+    registros_despues = int(mascara.sum())
     
-    logger.info(f"   ✅ Filtro aplicado: {registros_antes:,} → {len(df):,}")
-    logger.info(f"   📊 Eliminados: {eliminados:,}")
+    logger.info(f"   ✅ Filtro aplicado: {registros_antes:,} → {registros_despues:,}")
+    logger.info(f"   📊 Eliminados: {registros_antes - registros_despues:,}")
     
-    return df
+    return mascara
+
+
+def filtrar_abono_positivo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Filtra registros con abono > 0.
+    """
+    mascara = mascara_abono_positivo(df)
+    if mascara is None:
+        return df
+    return df.loc[mascara]
 
 
-def agrupar_duplicados_r05(df: pd.DataFrame) -> pd.DataFrame:
+def agrupar_duplicados_r05(df: pd.DataFrame, mascara=None) -> pd.DataFrame:
     """
     Agrupa duplicados por cedula_numero y corte, sumando abono.
     Renombra 'abono' a 'ABONO1'.
+    
+    Args:
+        df: DataFrame R05 con cedula_numero, corte y abono
+        mascara: Filas a considerar (p. ej. abono > 0); None usa todas
     """
     if not all(col in df.columns for col in ['cedula_numero', 'corte', 'abono']):
         logger.warning("   ⚠️  Faltan columnas necesarias para agrupar")
-        return df
+        return df if mascara is None else df.loc[mascara]
     
-    registros_antes = len(df)
+    registros_antes = len(df) if mascara is None else int(mascara.sum())
     
-    # Verificar duplicados
-    duplicados = df.duplicated(subset=['cedula_numero', 'corte']).sum()
-    logger.info(f"   📊 Duplicados encontrados: {duplicados:,}")
-    
-    if duplicados > 0:
-        # Agrupar
-        df = df.groupby(['cedula_numero', 'corte'], as_index=False)['abono'].sum()
-        logger.info(f"   ✅ Agrupación completada: {registros_antes:,} → {len(df):,}")
-    else:
-        logger.info(f"   ℹ️  Sin duplicados")
+    # Una sola pasada: agrupar siempre y contar los duplicados por diferencia
+    df = sumar_por_llave_y_corte(df['cedula_numero'], df['corte'], df['abono'], mascara)
+    logger.info(f"   📊 Duplicados agrupados: {registros_antes - len(df):,}")
+    logger.info(f"   ✅ Agrupación completada: {registros_antes:,} → {len(df):,}")
     
     # Renombrar 'abono' a 'ABONO1'
-    df.rename(columns={'abono': 'ABONO1'}, inplace=True)
+    renombrar_columnas(df, {'abono': 'ABONO1'})
     logger.info(f"   ✅ Columna renombrada: 'abono' → 'ABONO1'")
     
     return df
 
+
 def calcular_corte_fin_mes(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calcula el fin de mes desde MCNFECHA.
@@ -243,10 +291,14 @@ def calcular_corte_fin_mes(df: pd.DataFrame) -> pd.DataFrame:
         return df
     
     # Convertir a datetime
-    df['mcnfecha'] = pd.to_datetime(df['mcnfecha'], errors='coerce')
-    
-    # Calcular fin de mes (ceiling_date + 1 mes - 1 día)
-    df['corte'] = (df['mcnfecha'] + pd.offsets.MonthEnd(0))
+    df['mcnfecha'] = convertir_a_fecha(df['mcnfecha'])
+    
+    # Calcular fin de mes (ceiling_date + 1 mes - 1 día) con aritmética datetime64:
+    # truncar al mes, sumar un mes y restar un día (NaT se mantiene NaT)
+    fechas = df['mcnfecha'].to_numpy()
+    meses = fechas.astype('datetime64[M]')
+    fin_de_mes = (meses + np.timedelta64(1, 'M')).astype('datetime64[D]') - np.timedelta64(1, 'D')
+    df['corte'] = fin_de_mes.astype(fechas.dtype)
     
     logger.info(f"   ✅ 'corte' calculado desde 'mcnfecha'")
     
@@ -1,5 +1,5 @@
 import pandas as pd
-from .base import logger, convertir_columnas_minusculas, crear_llave_cedula_numero
+from .base import logger, convertir_columnas_minusculas, crear_llave_cedula_numero, renombrar_columnas, sumar_por_llave_y_corte, convertir_a_fecha
 
 def procesar_recaudos(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -10,7 +10,9 @@ def procesar_recaudos(df: pd.DataFrame) -> pd.DataFrame:
         return None
 
     logger.info("Iniciando limpieza y procesamiento de Recaudos...")
-    df_proc = df.copy()
+    # Copia superficial: los pasos renombran y asignan columnas sin tocar
+    # el DataFrame del llamador ni duplicar los datos
+    df_proc = df.copy(deep=False)
     registros_antes = len(df_proc)
 
     # 1. Convertir nombres de columnas a minúsculas
@@ -45,7 +47,7 @@ def procesar_recaudos(df: pd.DataFrame) -> pd.DataFrame:
         renames[columna_capital] = 'capitalrec'
     
     if renames:
-        df_proc.rename(columns=renames, inplace=True)
+        renombrar_columnas(df_proc, renames)
         logger.info(f"Columnas renombradas en Recaudos: {renames}")
 
     from .base import limpiar_columnas_numericas_como_string
@@ -53,7 +55,7 @@ def procesar_recaudos(df: pd.DataFrame) -> pd.DataFrame:
     
     # 3. Convertir tipos de datos
     if 'corte' in df_proc.columns:
-        df_proc['corte'] = pd.to_datetime(df_proc['corte'], errors='coerce')
+        df_proc['corte'] = convertir_a_fecha(df_proc['corte'])
     
     if 'capitalrec' in df_proc.columns:
         df_proc['capitalrec'] = pd.to_numeric(df_proc['capitalrec'], errors='coerce')
@@ -61,17 +63,21 @@ def procesar_recaudos(df: pd.DataFrame) -> pd.DataFrame:
     # 4. Crear la llave 'cedula_numero'
     df_proc = crear_llave_cedula_numero(df_proc, 'cedula', 'numero')
 
-    # 5. Filtrar por capitalrec > 0
+    # 5. Filtrar por capitalrec > 0 (máscara; se aplica junto con la agregación)
+    mascara = None
     if 'capitalrec' in df_proc.columns:
-        registros_antes_filtro = len(df_proc)
-        df_proc = df_proc[df_proc['capitalrec'] > 0].copy()
-        logger.info(f"Filtrado de Recaudos por capitalrec > 0: {registros_antes_filtro:,} -> {len(df_proc):,} registros.")
+        mascara = (df_proc['capitalrec'] > 0).to_numpy()
+        logger.info(f"Filtrado de Recaudos por capitalrec > 0: {len(df_proc):,} -> {int(mascara.sum()):,} registros.")
 
     # 6. Agrupar duplicados
     if 'cedula_numero' in df_proc.columns and 'corte' in df_proc.columns and 'capitalrec' in df_proc.columns:
-        registros_antes_agg = len(df_proc)
-        df_proc = df_proc.groupby(['cedula_numero', 'corte'], as_index=False)['capitalrec'].sum()
+        registros_antes_agg = int(mascara.sum())
+        df_proc = sumar_por_llave_y_corte(
+            df_proc['cedula_numero'], df_proc['corte'], df_proc['capitalrec'], mascara
+        )
         logger.info(f"Agregación de duplicados en Recaudos: {registros_antes_agg:,} -> {len(df_proc):,} registros.")
+    elif mascara is not None:
+        df_proc = df_proc.loc[mascara]
 
     logger.info(f"Limpieza y procesamiento de Recaudos completado: {registros_antes:,} -> {len(df_proc):,} registros.")
     return df_proc
\ No newline at end of file
@@ -1,3 +1,7 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -5,12 +9,106 @@ from datetime import datetime
 import openpyxl
 from typing import Dict, List
 
+# Motor de lectura: calamine (Rust) si python-calamine está instalado;
+# si no, el de pandas por defecto (openpyxl)
+try:
+    import python_calamine  # noqa: F401
+    MOTOR_EXCEL = "calamine"
+except ImportError:
+    MOTOR_EXCEL = None
+
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Caché opcional de hojas ya leídas (Parquet, requiere pyarrow). Se activa
+# pasando directorio_cache o con la variable de entorno FINNOVA_CACHE_COMPARADOR
+VARIABLE_CACHE = "FINNOVA_CACHE_COMPARADOR"
+MAX_ARCHIVOS_CACHE = 20
+
+
+def _directorio_cache(directorio_cache: str = None):
+    """Carpeta de caché a usar, o None si la caché está desactivada"""
+    directorio = directorio_cache or os.environ.get(VARIABLE_CACHE)
+    if not directorio or not HAS_PYARROW:
+        return None
+    return Path(directorio)
+
+
+def _ruta_cache(directorio: Path, ruta: str, hoja: str) -> Path:
+    """Archivo de caché de una hoja; cambia si el Excel se modifica"""
+    info = os.stat(ruta)
+    clave = f"{Path(ruta).resolve()}|{info.st_mtime_ns}|{info.st_size}|{hoja}"
+    return directorio / f"{hashlib.blake2b(clave.encode(), digest_size=16).hexdigest()}.parquet"
+
+
+def _podar_cache(directorio: Path):
+    """Deja solo los MAX_ARCHIVOS_CACHE archivos usados más recientemente"""
+    try:
+        archivos = sorted(directorio.glob("*.parquet"), key=lambda f: f.stat().st_mtime, reverse=True)
+        for archivo in archivos[MAX_ARCHIVOS_CACHE:]:
+            archivo.unlink(missing_ok=True)
+    except OSError:
+        pass  # Otro hilo podó al mismo tiempo: basta con la próxima vez
+
+
+def _leer_hoja(ruta: str, hoja: str, directorio_cache: str = None) -> pd.DataFrame:
+    """
+    Lee una hoja de Excel con el motor más rápido disponible.
+    Con la caché activa, si la misma versión del archivo ya se leyó antes se
+    carga desde Parquet sin volver a parsear el XML. Solo se guardan hojas
+    que vuelven de Parquet con los mismos dtypes (p. ej. no columnas object
+    mezcladas), para no inventar diferencias de tipo en la comparación.
+    """
+    directorio = _directorio_cache(directorio_cache)
+    if directorio is None:
+        return pd.read_excel(ruta, sheet_name=hoja, engine=MOTOR_EXCEL)
+    
+    ruta_cache = _ruta_cache(directorio, ruta, hoja)
+    if ruta_cache.exists():
+        try:
+            df = pd.read_parquet(ruta_cache)
+            os.utime(ruta_cache)  # Marca de uso reciente para la poda
+            return df
+        except Exception:
+            pass  # Caché corrupta: se vuelve a leer el Excel
+    
+    df = pd.read_excel(ruta, sheet_name=hoja, engine=MOTOR_EXCEL)
+    try:
+        directorio.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(ruta_cache, index=False)
+        if not pd.read_parquet(ruta_cache).dtypes.equals(df.dtypes):
+            ruta_cache.unlink(missing_ok=True)
+        _podar_cache(directorio)
+    except Exception:
+        # Sin permisos o tipos que Parquet no admite: se compara igual, sin caché
+        ruta_cache.unlink(missing_ok=True)
+    return df
+
+def _leer_ambos(ruta_r: str, ruta_python: str, hoja: str, directorio_cache: str = None):
+    """Lee la hoja de los dos archivos a la vez (son independientes)"""
+    # Mismo libro dos veces (prueba de humo): se abre y parsea una sola vez
+    if Path(ruta_r).resolve() == Path(ruta_python).resolve():
+        df = _leer_hoja(ruta_r, hoja, directorio_cache)
+        return df, df
+    
+    with ThreadPoolExecutor(max_workers=2) as ejecutor:
+        futuro_r = ejecutor.submit(_leer_hoja, ruta_r, hoja, directorio_cache)
+        futuro_py = ejecutor.submit(_leer_hoja, ruta_python, hoja, directorio_cache)
+        return futuro_r.result(), futuro_py.result()
+
+
 def comparar_excels(
     ruta_r: str,
     ruta_python: str,
     hoja: str = "Sheet1",
     generar_reporte: bool = True,
-    ruta_salida: str = "salidas"
+    ruta_salida: str = "salidas",
+    directorio_cache: str = None
 ) -> Dict:
     """
     Compara dos archivos Excel columna por columna.
@@ -25,6 +123,8 @@ def comparar_excels(
         hoja: Nombre de la hoja a comparar
         generar_reporte: Si genera archivo de reporte
         ruta_salida: Carpeta para guardar reportes
+        directorio_cache: Carpeta de caché Parquet de las hojas leídas
+            (opcional; por defecto FINNOVA_CACHE_COMPARADOR o sin caché)
     
     Returns:
         Dict con resultados de la comparación
@@ -35,8 +135,7 @@ def comparar_excels(
 
     # Cargar archivos
     try:
-        df_r = pd.read_excel(ruta_r, sheet_name=hoja)
-        df_py = pd.read_excel(ruta_python, sheet_name=hoja)
+        df_r, df_py = _leer_ambos(ruta_r, ruta_python, hoja, directorio_cache)
     except Exception as e:
         error_msg = f"❌ Error cargando archivos: {e}"
         print(error_msg)
@@ -93,35 +192,46 @@ def comparar_excels(
             reporte["diferencias"].append("⚠️ Mismas columnas pero orden diferente")
 
     # 3. Comparar tipos de datos
-    columnas_comunes = set(cols_r) & set(cols_py)
-    for col in columnas_comunes:
-        tipo_r = str(df_r[col].dtype)
-        tipo_py = str(df_py[col].dtype)
+    # Columnas comunes en el orden de R (una sola vez): el reporte sale
+    # siempre en el mismo orden, no en el de iterar un set
+    set_py = set(cols_py)
+    comunes_ordenadas = [col for col in cols_r if col in set_py]
+    tipos_r = df_r.dtypes
+    tipos_py = df_py.dtypes
+    tipos_distintos = set()
+    for col in comunes_ordenadas:
+        tipo_r = str(tipos_r[col])
+        tipo_py = str(tipos_py[col])
         if tipo_r != tipo_py:
+            tipos_distintos.add(col)
             reporte["tipos_ok"] = False
             reporte["diferencias"].append(f"❌ Tipo distinto en '{col}': R={tipo_r}, Python={tipo_py}")
 
     # 4. Comparar valores (solo en columnas comunes)
-    for col in columnas_comunes:
+    # Atajo: si todas las columnas comunes son iguales (valores y dtypes),
+    # un solo DataFrame.equals evita recorrerlas una por una
+    iguales = df_r[comunes_ordenadas].equals(df_py[comunes_ordenadas])
+    for col in ([] if iguales else comunes_ordenadas):
         serie_r = df_r[col]
         serie_py = df_py[col]
 
-        # Comparar valores (incluyendo NAs)
-        if not serie_r.equals(serie_py):
+        # Comparar valores (incluyendo NAs). Con dtypes distintos equals()
+        # siempre da False: se va directo a buscar las diferencias
+        if col in tipos_distintos or not serie_r.equals(serie_py):
             reporte["valores_ok"] = False
             
-            # Detectar diferencias específicas
-            diff_mask = (serie_r != serie_py) & ~(serie_r.isna() & serie_py.isna())
-            diff_count = diff_mask.sum()
+            # Detectar diferencias específicas (sobre los arreglos, sin Series intermedias)
+            valores_r = serie_r.to_numpy()
+            valores_py = serie_py.to_numpy()
+            posiciones = np.flatnonzero(_mascara_diferencias(valores_r, valores_py))
+            diff_count = len(posiciones)
             
             if diff_count > 0:
                 reporte["diferencias"].append(f"❌ {diff_count} valores distintos en '{col}'")
                 
                 # Muestra primeras diferencias (máximo 3)
-                diff_idx = serie_r[diff_mask].index[:3]
-                for idx in diff_idx:
-                    val_r = serie_r.iloc[idx]
-                    val_py = serie_py.iloc[idx]
+                primeras = posiciones[:3]
+                for idx, val_r, val_py in zip(primeras, serie_r.iloc[primeras].tolist(), serie_py.iloc[primeras].tolist()):
                     reporte["diferencias"].append(
                         f"   Fila {idx}: R='{val_r}' | Python='{val_py}'"
                     )
@@ -138,56 +248,118 @@ def comparar_excels(
 
     return reporte
 
+def _mascara_diferencias(valores_r: np.ndarray, valores_py: np.ndarray) -> np.ndarray:
+    """
+    Posiciones con valores distintos; dos nulos cuentan como iguales.
+    Se comparan solo las filas comunes (la diferencia de largo ya se reporta).
+    """
+    n = min(len(valores_r), len(valores_py))
+    a, b = valores_r[:n], valores_py[:n]
+    nulos_a = pd.isna(a)
+    nulos_b = pd.isna(b)
+    if a.dtype != b.dtype or a.dtype == object:
+        # object: los nulos (NaN, NaT, pd.NA) pasan a None para que != no
+        # devuelva pd.NA ni compare tipos incompatibles
+        a = a.astype(object)
+        b = b.astype(object)
+        a[nulos_a] = None
+        b[nulos_b] = None
+    return (a != b) & ~(nulos_a & nulos_b)
+
+
 def _guardar_reporte_completo(reporte: Dict, ruta_r: str, ruta_python: str, ruta_salida: str):
     """Guarda reporte detallado en archivo de texto"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     ruta_reporte = Path(ruta_salida) / f"reporte_diferencias_{timestamp}.txt"
     ruta_reporte.parent.mkdir(exist_ok=True)
     
-    with open(ruta_reporte, "w", encoding="utf-8") as f:
-        f.write("REPORTE DE COMPARACIÓN - EXCEL R vs PYTHON\n")
-        f.write("=" * 60 + "\n")
-        f.write(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Archivo R:     {ruta_r}\n")
-        f.write(f"Archivo Python: {ruta_python}\n")
-        f.write("=" * 60 + "\n\n")
-        
+    # Se arma el texto completo en memoria y se escribe de una vez
+    stats = reporte.get("estadisticas", {})
+    lineas = [
+        "REPORTE DE COMPARACIÓN - EXCEL R vs PYTHON",
+        "=" * 60,
+        f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Archivo R:     {ruta_r}",
+        f"Archivo Python: {ruta_python}",
+        "=" * 60,
+        "",
         # Estadísticas
-        stats = reporte.get("estadisticas", {})
-        f.write("ESTADÍSTICAS:\n")
-        f.write(f"- Filas R: {stats.get('filas_r', 'N/A')}\n")
-        f.write(f"- Filas Python: {stats.get('filas_python', 'N/A')}\n")
-        f.write(f"- Columnas R: {stats.get('columnas_r', 'N/A')}\n")
-        f.write(f"- Columnas Python: {stats.get('columnas_python', 'N/A')}\n\n")
-        
+        "ESTADÍSTICAS:",
+        f"- Filas R: {stats.get('filas_r', 'N/A')}",
+        f"- Filas Python: {stats.get('filas_python', 'N/A')}",
+        f"- Columnas R: {stats.get('columnas_r', 'N/A')}",
+        f"- Columnas Python: {stats.get('columnas_python', 'N/A')}",
+        "",
         # Diferencias
-        f.write("DIFERENCIAS ENCONTRADAS:\n")
-        f.write("-" * 40 + "\n")
-        if reporte["diferencias"]:
-            for diff in reporte["diferencias"]:
-                f.write(diff + "\n")
-        else:
-            f.write("No se encontraron diferencias\n")
-        
-        f.write("\n" + "=" * 60 + "\n")
-        f.write(f"RESUMEN: {reporte['resumen']}\n")
+        "DIFERENCIAS ENCONTRADAS:",
+        "-" * 40,
+    ]
+    lineas.extend(reporte["diferencias"] or ["No se encontraron diferencias"])
+    lineas += [
+        "",
+        "=" * 60,
+        f"RESUMEN: {reporte['resumen']}",
+    ]
+    ruta_reporte.write_text("\n".join(lineas) + "\n", encoding="utf-8")
     
     print(f"📄 Reporte guardado en: {ruta_reporte}")
 
-def comparacion_rapida(ruta_r: str, ruta_python: str, hoja: str = "Sheet1") -> bool:
+def _huella_filas(df: pd.DataFrame) -> np.ndarray:
+    """Un hash de 64 bits por fila (todas las columnas, sin índice) en una pasada en C"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _hash_archivo(ruta: str) -> str:
+    """blake2b de los bytes del archivo, leído en bloques de 1 MiB"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _archivos_identicos(ruta_r: str, ruta_python: str) -> bool:
+    """True si los dos archivos tienen exactamente los mismos bytes"""
+    try:
+        if os.path.getsize(ruta_r) != os.path.getsize(ruta_python):
+            return False
+        return _hash_archivo(ruta_r) == _hash_archivo(ruta_python)
+    except OSError:
+        return False  # Que la lectura normal reporte el error
+
+
+def comparacion_rapida(ruta_r: str, ruta_python: str, hoja: str = "Sheet1",
+                       directorio_cache: str = None) -> bool:
     """
-    Versión rápida que solo verifica si los archivos son idénticos
+    Versión rápida que solo verifica si los archivos son idénticos.
+    
+    Si los dos archivos son idénticos byte a byte no se parsea nada.
+    Si no, no arma el reporte: compara columnas, dtypes y largo, y luego una
+    huella por fila. Las columnas object se hashean como texto (1 y "1"
+    dan la misma huella), así que si las huellas coinciden esas columnas
+    se confirman con equals().
     
     Returns:
         bool: True si son idénticos, False si hay diferencias
     """
-    resultado = comparar_excels(ruta_r, ruta_python, hoja, generar_reporte=False)
-    return all([
-        resultado["columnas_ok"],
-        resultado["orden_ok"], 
-        resultado["tipos_ok"],
-        resultado["valores_ok"]
-    ])
+    if _archivos_identicos(ruta_r, ruta_python):
+        return True
+    
+    try:
+        df_r, df_py = _leer_ambos(ruta_r, ruta_python, hoja, directorio_cache)
+    except Exception as e:
+        print(f"❌ Error cargando archivos: {e}")
+        return False
+    
+    if df_r.columns.tolist() != df_py.columns.tolist() or len(df_r) != len(df_py):
+        return False
+    if not df_r.dtypes.equals(df_py.dtypes):
+        return False
+    if not np.array_equal(_huella_filas(df_r), _huella_filas(df_py)):
+        return False
+    
+    columnas_object = [col for col, tipo in df_r.dtypes.items() if tipo == object]
+    return df_r[columnas_object].equals(df_py[columnas_object])
 
 # Ejemplo de uso independiente
 if __name__ == "__main__":
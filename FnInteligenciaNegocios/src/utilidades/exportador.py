@@ -1,6 +1,7 @@
 """
 Módulo para exportar DataFrames a Excel con formato y timestamp
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
@@ -8,26 +9,49 @@ from src.utilidades.logger import configurar_logger
 
 logger = configurar_logger('finnovarisk.exportador')
 
+# Motor de escritura: xlsxwriter (una sola pasada, sin modelo en memoria del
+# libro) si está instalado; si no, openpyxl como antes
+try:
+    import xlsxwriter  # noqa: F401
+    MOTOR_EXCEL = 'xlsxwriter'
+except ImportError:
+    MOTOR_EXCEL = 'openpyxl'
 
-def guardar_excel(df: pd.DataFrame, nombre: str, carpeta: str = "./datos/salidas"):
+
+# Formatos de salida de guardar_excel → extensión del archivo
+EXTENSIONES = {'xlsx': '.xlsx', 'parquet': '.parquet', 'csv': '.csv'}
+
+
+def guardar_excel(df: pd.DataFrame, nombre: str, carpeta: str = "./datos/salidas",
+                  formato: str = "xlsx", dtype_hints: dict = None, optimizar_tipos: bool = False):
     """
     Guarda un DataFrame en Excel con timestamp.
     
+    Para DataFrames grandes, formato="parquet" (zstd) o formato="csv" evitan
+    el costo del ZIP+XML de xlsx y generan archivos mucho más pequeños.
+    
     Args:
         df: DataFrame a guardar
         nombre: Nombre base del archivo
         carpeta: Carpeta destino (por defecto 'salidas')
+        formato: 'xlsx' (por defecto), 'parquet' o 'csv'
+        dtype_hints: Tipos {columna: dtype} a fijar una vez antes de escribir
+        optimizar_tipos: Si aplica convert_dtypes() para que el escritor
+            reciba columnas de tipo uniforme en lugar de object mezclado
         
     Returns:
         Path del archivo guardado
     """
+    if formato not in EXTENSIONES:
+        raise ValueError(f"Formato no soportado: '{formato}'. Use uno de {list(EXTENSIONES)}")
+    
     # Crear carpeta si no existe
     ruta_carpeta = Path(carpeta)
     ruta_carpeta.mkdir(parents=True, exist_ok=True)
     
     # Crear nombre con timestamp
     timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    nombre_archivo = f"{nombre}_{timestamp}.xlsx"
+    nombre_archivo = f"{nombre}_{timestamp}{EXTENSIONES[formato]}"
     ruta_completa = ruta_carpeta / nombre_archivo
     
     # Guardar
@@ -35,12 +59,23 @@ def guardar_excel(df: pd.DataFrame, nombre: str, carpeta: str = "./datos/salidas
     logger.info(f"   Registros: {len(df):,}")
     logger.info(f"   Columnas: {len(df.columns)}")
     
+    # Tipos fijados una sola vez, no inferidos celda por celda al escribir
+    if dtype_hints:
+        df = df.astype(dtype_hints)
+    if optimizar_tipos:
+        df = df.convert_dtypes()
+    
     try:
-        df.to_excel(ruta_completa, index=False, engine='openpyxl')
+        if formato == 'parquet':
+            df.to_parquet(ruta_completa, index=False, compression='zstd')
+        elif formato == 'csv':
+            df.to_csv(ruta_completa, index=False)
+        else:
+            df.to_excel(ruta_completa, index=False, engine=MOTOR_EXCEL)
         
         # Tamaño del archivo
         tamaño_mb = ruta_completa.stat().st_size / 1024**2
-        logger.info(f"   ✅ Guardado exitosamente ({tamaño_mb:.2f} MB)")
+        logger.info(f"   ✅ Guardado exitosamente como {formato} ({tamaño_mb:.2f} MB)")
         logger.info(f"   📁 Ruta: {ruta_completa}")
         
         return ruta_completa
@@ -50,35 +85,81 @@ def guardar_excel(df: pd.DataFrame, nombre: str, carpeta: str = "./datos/salidas
         raise
 
 
-def guardar_multiples_hojas(dict_dataframes: dict, nombre_archivo: str, carpeta: str = "./datos/salidas"):
+def _guardar_hoja_archivo(df: pd.DataFrame, ruta: Path, formato: str):
+    """Escribe una hoja como archivo independiente (parquet o csv)"""
+    if formato == 'parquet':
+        df.to_parquet(ruta, index=False, compression='zstd')
+    else:
+        df.to_csv(ruta, index=False)
+
+
+def guardar_multiples_hojas(dict_dataframes: dict, nombre_archivo: str, carpeta: str = "./datos/salidas",
+                            formato: str = "xlsx"):
     """
     Guarda múltiples DataFrames en un solo Excel con diferentes hojas.
     
+    Con formato="parquet" o formato="csv" cada hoja se escribe como un
+    archivo propio dentro de una carpeta con timestamp, en paralelo
+    (la compresión y el formateo de CSV sueltan el GIL). En xlsx las hojas
+    comparten un solo libro y se escriben una tras otra.
+    
     Args:
         dict_dataframes: Diccionario {nombre_hoja: DataFrame}
         nombre_archivo: Nombre del archivo Excel
         carpeta: Carpeta destino
+        formato: 'xlsx' (por defecto), 'parquet' o 'csv'
         
     Returns:
-        Path del archivo guardado
+        Path del archivo guardado (o de la carpeta, si no es xlsx)
     """
+    if formato not in EXTENSIONES:
+        raise ValueError(f"Formato no soportado: '{formato}'. Use uno de {list(EXTENSIONES)}")
+    
     ruta_carpeta = Path(carpeta)
     ruta_carpeta.mkdir(parents=True, exist_ok=True)
     
     timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    
+    if formato != 'xlsx':
+        ruta_destino = ruta_carpeta / f"{nombre_archivo}_{timestamp}"
+        ruta_destino.mkdir(parents=True, exist_ok=True)
+        logger.info(f"💾 Guardando {len(dict_dataframes)} hojas ({formato}) en: {ruta_destino.name}")
+        
+        try:
+            with ThreadPoolExecutor() as ejecutor:
+                futuros = {
+                    nombre_hoja: ejecutor.submit(
+                        _guardar_hoja_archivo, df,
+                        ruta_destino / f"{nombre_hoja}{EXTENSIONES[formato]}", formato
+                    )
+                    for nombre_hoja, df in dict_dataframes.items()
+                }
+                for nombre_hoja, futuro in futuros.items():
+                    futuro.result()
+                    logger.info("   ✅ Hoja '%s': %s registros", nombre_hoja, f"{len(dict_dataframes[nombre_hoja]):,}")
+            
+            tamaño_mb = sum(f.stat().st_size for f in ruta_destino.iterdir()) / 1024**2
+            logger.info(f"   📁 Carpeta guardada ({tamaño_mb:.2f} MB): {ruta_destino}")
+            
+            return ruta_destino
+            
+        except Exception as e:
+            logger.error(f"   ❌ Error guardando {nombre_archivo}: {e}")
+            raise
+    
     nombre_con_timestamp = f"{nombre_archivo}_{timestamp}.xlsx"
     ruta_completa = ruta_carpeta / nombre_con_timestamp
     
     logger.info(f"💾 Guardando múltiples hojas en: {nombre_con_timestamp}")
     
     try:
-        with pd.ExcelWriter(ruta_completa, engine='openpyxl') as writer:
+        with pd.ExcelWriter(ruta_completa, engine=MOTOR_EXCEL) as writer:
             for nombre_hoja, df in dict_dataframes.items():
                 # Excel no permite nombres de hojas > 31 caracteres
                 nombre_hoja_limpio = nombre_hoja[:31]
                 
                 df.to_excel(writer, sheet_name=nombre_hoja_limpio, index=False)
-                logger.info(f"   ✅ Hoja '{nombre_hoja_limpio}': {len(df):,} registros")
+                logger.info("   ✅ Hoja '%s': %s registros", nombre_hoja_limpio, f"{len(df):,}")
         
         tamaño_mb = ruta_completa.stat().st_size / 1024**2
         logger.info(f"   📁 Archivo guardado ({tamaño_mb:.2f} MB): {ruta_completa}")
@@ -10,6 +10,9 @@ from pathlib import Path
 import json
 
 
+# Loggers ya configurados: volver a pedirlos no reabre el archivo de log
+_CONFIGURADOS: set = set()
+
 
 class ColoresConsola:
     """Códigos de color para consola."""
@@ -42,6 +45,7 @@ class FormateadorColor(logging.Formatter):
 def configurar_logger(nombre: str = "finnovarisk", nivel: int = logging.INFO) -> logging.Logger:
     """
     Configura el sistema de logging con salida a consola y archivo.
+    Es idempotente: si el logger ya se configuró, se devuelve tal cual.
     
     Args:
         nombre: Nombre del logger
@@ -50,6 +54,10 @@ def configurar_logger(nombre: str = "finnovarisk", nivel: int = logging.INFO) ->
     Returns:
         Logger configurado
     """
+    logger = logging.getLogger(nombre)
+    if nombre in _CONFIGURADOS and logger.handlers:
+        return logger
+    
     # Crear carpeta de logs si no existe
     carpeta_logs = Path("logs")
     carpeta_logs.mkdir(exist_ok=True)
@@ -57,11 +65,9 @@ def configurar_logger(nombre: str = "finnovarisk", nivel: int = logging.INFO) ->
     # Nombre del archivo log con fecha y hora
     archivo_log = carpeta_logs / f"logger.log"
     
-    # Crear logger
-    logger = logging.getLogger(nombre)
     logger.setLevel(nivel)
     
-    # Limpiar handlers anteriores si existen
+    # Limpiar handlers anteriores si existen (configurados por fuera)
     if logger.handlers:
         logger.handlers.clear()
     
@@ -102,7 +108,9 @@ def configurar_logger(nombre: str = "finnovarisk", nivel: int = logging.INFO) ->
     logger.addHandler(handler_archivo)
     logger.addHandler(handler_consola)
     
-    # Log inicial
+    _CONFIGURADOS.add(nombre)
+    
+    # Log inicial (solo la primera vez)
     logger.info(f"📝 Log guardado en: {archivo_log}")
     
     return logger
@@ -3,19 +3,24 @@ Módulo de validación de DataFrames.
 Verifica integridad y calidad de los datos cargados.
 """
 
+import logging
+import os
 import pandas as pd
 from typing import Dict, List
 from src.utilidades.logger import configurar_logger
 
 logger = configurar_logger('finnovarisk.transformador')
 
-def validar_dataframe(df: pd.DataFrame, nombre: str) -> Dict:
+def validar_dataframe(df: pd.DataFrame, nombre: str, detallado: bool = False) -> Dict:
     """
     Valida un DataFrame y retorna un reporte de validación.
     
     Args:
         df: DataFrame a validar
         nombre: Nombre descriptivo del DataFrame
+        detallado: Si mide la memoria real de las columnas de texto
+            (memory_usage(deep=True) recorre cada string; sin él la cifra
+            es casi instantánea pero solo cuenta los punteros)
         
     Returns:
         Diccionario con resultado de validación
@@ -37,11 +42,13 @@ def validar_dataframe(df: pd.DataFrame, nombre: str) -> Dict:
     resultado["estadisticas"] = {
         "registros": len(df),
         "columnas": len(df.columns),
-        "memoria_mb": df.memory_usage(deep=True).sum() / 1024**2
+        "memoria_mb": df.memory_usage(deep=detallado).sum() / 1024**2
     }
     
-    # Verificar valores nulos
-    porcentaje_nulos = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+    # Verificar valores nulos: un solo conteo por columna sirve para el
+    # porcentaje total, la columna 'corte' y las columnas vacías
+    nulos_por_columna = df.isnull().sum()
+    porcentaje_nulos = (int(nulos_por_columna.sum()) / (len(df) * len(df.columns))) * 100
     
     if porcentaje_nulos > 50:
         resultado["advertencias"].append(
@@ -58,15 +65,19 @@ def validar_dataframe(df: pd.DataFrame, nombre: str) -> Dict:
     
     # Verificar columna 'corte' si existe
     if 'corte' in df.columns:
-        if df['corte'].isnull().any():
+        if nulos_por_columna['corte'] > 0:
             resultado["advertencias"].append(
                 "La columna 'corte' tiene valores nulos"
             )
         
         # Verificar rango de fechas
         try:
-            fecha_min = pd.to_datetime(df['corte']).min()
-            fecha_max = pd.to_datetime(df['corte']).max()
+            # Se convierte una sola vez (y nada si ya es datetime)
+            corte = df['corte']
+            if not pd.api.types.is_datetime64_any_dtype(corte):
+                corte = pd.to_datetime(corte)
+            fecha_min = corte.min()
+            fecha_max = corte.max()
             resultado["estadisticas"]["fecha_min"] = fecha_min.strftime('%Y-%m-%d')
             resultado["estadisticas"]["fecha_max"] = fecha_max.strftime('%Y-%m-%d')
         except:
@@ -75,7 +86,7 @@ def validar_dataframe(df: pd.DataFrame, nombre: str) -> Dict:
             )
     
     # Verificar columnas con todos valores nulos
-    columnas_todas_nulas = df.columns[df.isnull().all()].tolist()
+    columnas_todas_nulas = nulos_por_columna.index[nulos_por_columna == len(df)].tolist()
     if columnas_todas_nulas:
         resultado["advertencias"].append(
             f"Columnas completamente vacías: {', '.join(columnas_todas_nulas[:5])}"
@@ -174,13 +185,15 @@ def validar_tipos_datos(df: pd.DataFrame, esquema: Dict[str, type]) -> Dict:
     return resultado
 
 
-def generar_reporte_calidad(df: pd.DataFrame, nombre: str) -> str:
+def generar_reporte_calidad(df: pd.DataFrame, nombre: str, detallado: bool = False) -> str:
     """
     Genera un reporte detallado de calidad de datos.
     
     Args:
         df: DataFrame a analizar
         nombre: Nombre del DataFrame
+        detallado: Si mide la memoria real de las columnas de texto
+            (más lento en DataFrames grandes con strings)
         
     Returns:
         String con el reporte formateado
@@ -194,7 +207,7 @@ def generar_reporte_calidad(df: pd.DataFrame, nombre: str) -> str:
     reporte.append(f"\n📊 Información General:")
     reporte.append(f"  • Registros: {len(df):,}")
     reporte.append(f"  • Columnas: {len(df.columns)}")
-    reporte.append(f"  • Memoria: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+    reporte.append(f"  • Memoria: {df.memory_usage(deep=detallado).sum() / 1024**2:.2f} MB")
     
     # Valores nulos por columna
     reporte.append(f"\n❓ Valores Nulos:")
@@ -233,7 +246,12 @@ def generar_reporte_calidad(df: pd.DataFrame, nombre: str) -> str:
 def diagnosticar_dataframe(df: pd.DataFrame, nombre: str) -> None:
     """
     Función de diagnóstico para verificar la estructura de un DataFrame.
+    Solo se ejecuta con la variable de entorno FINNOVA_DEBUG_DF=1.
     """
+    # Armar el repr de dtypes y head() cuesta; en producción se omite todo
+    if os.environ.get("FINNOVA_DEBUG_DF") != "1" or not logger.isEnabledFor(logging.INFO):
+        return
+    
     logger.info(f"=== DIAGNÓSTICO {nombre} ===")
     if df is None:
         logger.info("DataFrame es None")
@@ -241,7 +259,7 @@ def diagnosticar_dataframe(df: pd.DataFrame, nombre: str) -> None:
     
     logger.info(f"Shape: {df.shape}")
     logger.info(f"Columnas: {list(df.columns)}")
-    logger.info(f"Tipos de datos:\n{df.dtypes}")
+    logger.info("Tipos de datos:\n%s", df.dtypes)
     if len(df) > 0:
-        logger.info(f"Primeras filas:\n{df.head(2)}")
-    logger.info("=== FIN DIAGNÓSTICO ===")
\ No newline at end of file
+        logger.info("Primeras filas:\n%s", df.head(2))
+    logger.info("=== FIN DIAGNÓSTICO ===")